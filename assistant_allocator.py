@@ -0,0 +1,158 @@
+import logging
+
+import pandas as pd
+
+# Teaching and lab assistant allocation (REQ-17) for TimetableGenerator.allocate_assistants(),
+# run after scheduling on the placed sessions.
+#
+# Positions: each course of a placed lecture or tutorial needs one teaching assistant per
+# full teaching_assistant_threshold students once its enrollment exceeds the threshold,
+# and each course of a placed practical (one per lab batch) needs one lab assistant.
+# An assistant can fill a position of a course listed for them in assistants.csv, and a
+# lab position only where that row has is_lab_eligible set.
+#
+# Lab batches that the scheduler placed side by side because an assistant was free to
+# supervise them (TimetableGenerator.lab_supervisors) get that assistant first. The other
+# positions are split into groups that all overlap in time: sorted by end, each group
+# takes every position running through the last slot of the first one. Within a group
+# an assistant can fill at most one position, so the group is a bipartite matching of
+# positions to the assistants not yet busy at that time, solved to maximum size with
+# augmenting paths. Candidates are tried by fewest positions already held, spreading the load.
+# Busy masks per (assistant, day) carry over between groups, so nobody is double-booked.
+#
+# Preference windows are hard: an assistant with windows in assistants.csv only fills
+# positions lying inside one of them, and one without any window is available all week.
+# With assistants_outside_window set in config.csv they may also fill positions outside
+# their windows, but are tried inside them first.
+
+
+class Position:
+    __slots__ = ("session", "course_code", "room", "day", "start_idx", "end_idx", "mask", "lab")
+
+    def __init__(self, session, course_code, room, day, start_idx, lab):
+        self.session = session
+        self.course_code = course_code
+        self.room = room
+        self.day = day
+        self.start_idx = start_idx
+        self.end_idx = start_idx + session.duration_slots
+        self.mask = ((1 << session.duration_slots) - 1) << start_idx
+        self.lab = lab
+
+
+def positions(generator):
+    # Assistant positions of the placed sessions, in session order
+    result = []
+    for session in generator.sessions:
+        placement = generator.placements.get(session)
+        if placement is None:
+            continue
+        day, start_idx, rooms = placement
+        for (course_code, enrollment, _), room in zip(session.unit.room_courses, rooms):
+            if session.component == "practical":
+                result.append(Position(session, course_code, room, day, start_idx, True))
+            elif enrollment > generator.ta_threshold:
+                result.extend(Position(session, course_code, room, day, start_idx, False)
+                              for _ in range(int(enrollment) // generator.ta_threshold))
+    return result
+
+
+def overlap_groups(items):
+    # Partition positions into groups sharing a common slot (per day, by end slot)
+    groups = []
+    point = None
+    for item in sorted(items, key=lambda item: (item.day, item.end_idx)):
+        if point is None or point[0] != item.day or item.start_idx > point[1]:
+            point = (item.day, item.end_idx - 1)
+            groups.append([])
+        groups[-1].append(item)
+    return groups
+
+
+def eligibility(generator):
+    # {course_code: {assistant_id: lab eligible}} and {assistant_id: {day: preference window mask}}
+    courses_by_id = {course.course_id: course for course in generator.courses}
+    eligible = {}
+    windows = {}
+    for record in generator.assistants_df.to_dict("records"):
+        course = courses_by_id.get(int(record["course_id"]))
+        if course is None:
+            logging.warning(f"Assistant {record['assistant_id']} is listed for unknown course {record['course_id']}")
+            continue
+        assistant_id = int(record["assistant_id"])
+        lab = str(record["is_lab_eligible"]).strip().upper() == "TRUE"
+        by_assistant = eligible.setdefault(course.course_code, {})
+        by_assistant[assistant_id] = by_assistant.get(assistant_id, False) or lab
+        if not pd.isna(record["preference_day"]):
+            mask = generator.window_mask(record["preference_start_time"], record["preference_end_time"])
+            by_day = windows.setdefault(assistant_id, {})
+            for day in generator.csv_days(record["preference_day"]):
+                by_day[day] = by_day.get(day, 0) | mask
+    return eligible, windows
+
+
+def in_window(windows, assistant_id, day, mask):
+    # Whether the slots in mask lie in the assistant's preference window that day
+    by_day = windows.get(assistant_id)
+    return by_day is None or by_day.get(day, 0) & mask == mask
+
+
+def allocate(generator):
+    # {assistant_id: [position, ...]} and the positions left unfilled
+    eligible, windows = generator.assistant_eligible, generator.assistant_windows
+    busy = {}
+    assigned = {}
+    unfilled = []
+
+    # Lab batches the scheduler placed side by side on the strength of an assistant
+    # (generator.lab_supervisors) get that assistant first, while the placement allows it
+    remaining = []
+    for item in positions(generator):
+        assistant_id = generator.lab_supervisors.get(item.session, {}).get(item.course_code)
+        if assistant_id is None or not eligible.get(item.course_code, {}).get(assistant_id) or \
+           busy.get((assistant_id, item.day), 0) & item.mask or \
+           not (generator.assistants_outside_window or in_window(windows, assistant_id, item.day, item.mask)):
+            remaining.append(item)
+            continue
+        assigned.setdefault(assistant_id, []).append(item)
+        busy[(assistant_id, item.day)] = busy.get((assistant_id, item.day), 0) | item.mask
+
+    for group in overlap_groups(remaining):
+        # Candidates per position, best first
+        candidates = []
+        for item in group:
+            options = [assistant_id for assistant_id, lab in eligible.get(item.course_code, {}).items()
+                       if (lab or not item.lab) and not busy.get((assistant_id, item.day), 0) & item.mask
+                       and (generator.assistants_outside_window or in_window(windows, assistant_id, item.day, item.mask))]
+            options.sort(key=lambda assistant_id: (not in_window(windows, assistant_id, item.day, item.mask),
+                                                   len(assigned.get(assistant_id, ()))))
+            candidates.append(options)
+
+        # Maximum matching by augmenting paths (Kuhn); holder[assistant] = position index
+        holder = {}
+
+        def augment(number, seen):
+            for assistant_id in candidates[number]:
+                if assistant_id in seen:
+                    continue
+                seen.add(assistant_id)
+                if assistant_id not in holder or augment(holder[assistant_id], seen):
+                    holder[assistant_id] = number
+                    return True
+            return False
+
+        for number in range(len(group)):
+            if candidates[number]:
+                augment(number, set())
+
+        filled = set()
+        for assistant_id, number in holder.items():
+            item = group[number]
+            assigned.setdefault(assistant_id, []).append(item)
+            busy[(assistant_id, item.day)] = busy.get((assistant_id, item.day), 0) | item.mask
+            filled.add(number)
+        unfilled.extend(item for number, item in enumerate(group) if number not in filled)
+
+    total = sum(len(items) for items in assigned.values()) + len(unfilled)
+    logging.info(f"Assigned {total - len(unfilled)} of {total} assistant positions to {len(assigned)} assistants")
+    return assigned, unfilled
@@ -0,0 +1,129 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from synthetic_institute import generate
+from timetable_generator import TimetableGenerator
+
+# Benchmarks of the scheduler on synthetic institutes (synthetic_institute.py) at several
+# scales: the two hot-path probes (slot availability and room search, timed per call on
+# a scheduled timetable) and the pipeline stages (load, greedy scheduling, HTML, Excel and
+# the faculty/room views). Logging is switched off while timing.
+#
+#   python benchmark.py --scales 1,10 --json bench.json
+#   python benchmark.py --scales 1,10 --baseline bench.json   # exit code 1 on regressions
+
+
+def best_time(function, repeat):
+    # Fastest of `repeat` calls, in seconds
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def probe_cases(generator, count, seed=0):
+    # Random (session, day, start_idx) triples at allowed starts, shared by both probes
+    rng = random.Random(seed)
+    cases = []
+    while len(cases) < count:
+        session = rng.choice(generator.sessions)
+        allowed = generator.get_allowed_starts(session.unit.dept, session.duration_slots)
+        starts = [idx for idx in range(len(generator.time_slots)) if allowed >> idx & 1]
+        if starts:
+            cases.append((session, rng.choice(generator.scheduling_days), rng.choice(starts)))
+    return cases
+
+
+def run_scale(scale, tightness, repeat, probes):
+    # {measurement: seconds} for one synthetic institute; probes are per call
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "data")
+        counts = generate(data_dir, scale, tightness)
+        generator = TimetableGenerator(data_dir, os.path.join(root, "output"))
+        results["load"] = best_time(generator.load, repeat)
+        results["schedule"] = best_time(lambda: generator.schedule(repair_iterations=0), repeat)
+
+        cases = probe_cases(generator, probes)
+        slot_cases = [(day, generator.time_slots[start_idx], session.duration_slots, session.unit.timetable_keys[0],
+                       session.unit.faculty_ids, session.unit.section_id, session.unit.dept) for session, day, start_idx in cases]
+
+        def availability():
+            for case in slot_cases:
+                generator.is_slot_available(*case)
+
+        def rooms():
+            for case in cases:
+                generator.free_rooms(*case)
+
+        results["availability probe"] = best_time(availability, 5) / probes
+        results["room probe"] = best_time(rooms, 5) / probes
+
+        results["render html"] = best_time(generator.render_html, repeat)
+        results["render excel"] = best_time(generator.render_excel, repeat)
+        results["render views"] = best_time(generator.render_views, repeat)
+        placed = len(generator.placements)
+    print(f"scale {scale}: {counts['courses']} courses, {counts['sections']} sections, {counts['rooms']} rooms, "
+          f"{placed} of {len(generator.sessions)} sessions placed")
+    return results
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the timetable generator on synthetic institutes.")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated institute sizes (default: 1,10,100)")
+    parser.add_argument("--tightness", type=float, default=1.0, help="demand relative to rooms and faculty (default: 1.0)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per pipeline stage, the fastest is kept (default: 3)")
+    parser.add_argument("--probes", type=int, default=20000, help="calls per probe measurement (default: 20000)")
+    parser.add_argument("--json", default=None, help="save the results to this file")
+    parser.add_argument("--baseline", default=None, help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown against the baseline reported as a regression (default: 0.25, i.e. 25%%)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    results = {}
+    for scale in (int(value) for value in args.scales.split(",")):
+        results[str(scale)] = run_scale(scale, args.tightness, args.repeat, args.probes)
+        for name, seconds in results[str(scale)].items():
+            print(f"  {name:<20} {format_seconds(seconds):>12}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"tightness": args.tightness, "results": results}, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for scale, measurements in results.items():
+            for name, seconds in measurements.items():
+                before = baseline.get(scale, {}).get(name)
+                if before and seconds > before * (1 + args.tolerance):
+                    regressions.append(f"scale {scale} {name}: {format_seconds(before)} -> {format_seconds(seconds)} "
+                                       f"(+{(seconds / before - 1) * 100:.0f}%)")
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
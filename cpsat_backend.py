@@ -0,0 +1,203 @@
+import logging
+from itertools import combinations
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # optional dependency, only needed for --backend cpsat
+    cp_model = None
+
+# Exact scheduling backend for TimetableGenerator.schedule(backend="cpsat").
+#
+# Every session of every unit gets an optional interval over a week-long time axis
+# (day_index * slots_per_day + slot_index) whose start is restricted to the department's
+# allowed starts on each day, so breaks, reserved slots and the end of the day are
+# respected. No-overlap constraints are added per timetable key, per faculty member and
+# per room; each room request of a session picks exactly one room from the same
+# capacity-sorted candidates assign_room uses. Basket and combined sessions are single
+# intervals shared by all their timetable keys, which couples them the same way the
+# greedy scheduler does. Slots booked in a shared calendar by other runs (see
+# occupancy_store) remove the starts that overlap them: from the session's domain for its
+# faculty, and for a room only when that room is chosen. Lab batches of a practical with
+# parallel_batches > 1 either lead their slot, holding the sections and faculty, or join
+# an earlier lead batch of the same unit at the same start in labs of their own, at most
+# parallel_batches - 1 per lead (see TimetableGenerator.place_lab_batches). Only the
+# faculty count as supervisors here: the model has no assistant variables, so batches the
+# greedy pass gave to assistants are left out of the warm start. The model maximises the number
+# of placed slots, then prefers earlier starts within the day, and is warm-started from
+# the clash-free part of the greedy placements.
+
+
+def calendar_free(busy, entities, positions, days, slots_per_day, duration):
+    # The week positions at which none of the entities is booked in the calendar
+    if not busy:
+        return positions
+    window = (1 << duration) - 1
+    return [position for position in positions
+            if not any(busy.get((entity, days[position // slots_per_day]), 0) >> position % slots_per_day & window
+                       for entity in entities)]
+
+
+def solve(generator, time_limit=30.0, num_workers=8):
+    if cp_model is None:
+        raise RuntimeError("The cpsat backend needs OR-Tools: pip install ortools")
+
+    slots_per_day = len(generator.time_slots)
+    days = generator.scheduling_days
+    sessions = generator.sessions
+    model = cp_model.CpModel()
+
+    present = {}
+    starts = {}
+    day_vars = {}
+    slot_vars = {}
+    slot_positions = {}
+    room_choices = {}
+    key_intervals = {}
+    faculty_intervals = {}
+    room_intervals = {}
+    calendar = generator.calendar_busy
+    leads = {}
+    for number, session in enumerate(sessions):
+        unit = session.unit
+        duration = session.duration_slots
+        allowed = generator.get_allowed_starts(unit.dept, duration)
+        positions = [idx for idx in range(slots_per_day) if allowed >> idx & 1]
+        # Week positions, leaving out the starts that run into a reserved slot of the day or a
+        # calendar booking of the unit's faculty
+        week_positions = [day_idx * slots_per_day + idx for day_idx, day_name in enumerate(days)
+                          for idx in range(slots_per_day) if generator.get_allowed_starts(unit.dept, duration, day_name) >> idx & 1]
+        week_positions = calendar_free(calendar["faculty"], unit.faculty, week_positions, days, slots_per_day, duration)
+        candidates = [generator.room_candidates(*request) for request in session.room_requests]
+        if not week_positions or not all(candidates):
+            continue
+
+        is_present = model.NewBoolVar(f"present_{number}")
+        day = model.NewIntVar(0, len(days) - 1, f"day_{number}")
+        slot = model.NewIntVarFromDomain(cp_model.Domain.FromValues(positions), f"slot_{number}")
+        start = model.NewIntVarFromDomain(cp_model.Domain.FromValues(week_positions), f"start_{number}")
+        model.Add(start == slots_per_day * day + slot)
+        if session.component == "practical" and unit.parallel_batches > 1:
+            leads[session] = model.NewBoolVar(f"lead_{number}")
+        interval = model.NewOptionalFixedSizeIntervalVar(start, duration, leads.get(session, is_present), f"interval_{number}")
+        present[session], starts[session], day_vars[session], slot_vars[session] = is_present, start, day, slot
+        slot_positions[session] = week_positions
+
+        # Basket units can list a section once per member course
+        for key in dict.fromkeys(unit.timetable_keys):
+            key_intervals.setdefault(key, []).append(interval)
+        for fid in dict.fromkeys(unit.faculty):
+            faculty_intervals.setdefault(fid, []).append(interval)
+
+        # One room per request, all in the session's time window
+        room_choices[session] = []
+        for request_idx, rooms in enumerate(candidates):
+            choices = {}
+            for room in rooms:
+                room_positions = calendar_free(calendar["room"], [room], week_positions, days, slots_per_day, duration)
+                if not room_positions:
+                    continue
+                chosen = model.NewBoolVar(f"room_{number}_{request_idx}_{room}")
+                if len(room_positions) < len(week_positions):
+                    model.AddLinearExpressionInDomain(start, cp_model.Domain.FromValues(room_positions)).OnlyEnforceIf(chosen)
+                room_intervals.setdefault(room, []).append(
+                    model.NewOptionalFixedSizeIntervalVar(start, duration, chosen, f"room_interval_{number}_{request_idx}_{room}"))
+                choices[room] = chosen
+            model.Add(sum(choices.values()) == is_present)
+            room_choices[session].append(choices)
+
+    for intervals in list(key_intervals.values()) + list(faculty_intervals.values()) + list(room_intervals.values()):
+        if len(intervals) > 1:
+            model.AddNoOverlap(intervals)
+
+    # A present lab batch leads its slot or joins exactly one earlier lead batch
+    joins = {}
+    for unit in generator.units:
+        batches = [session for session in unit.sessions if session in leads]
+        for position, session in enumerate(batches):
+            joins[session] = {}
+            for other in batches[:position]:
+                joined = model.NewBoolVar(f"join_{id(session)}_{id(other)}")
+                model.Add(starts[session] == starts[other]).OnlyEnforceIf(joined)
+                model.AddImplication(joined, leads[other])
+                joins[session][other] = joined
+            model.Add(leads[session] + sum(joins[session].values()) == present[session])
+        for other in batches:
+            model.Add(sum(joins[session][other] for session in batches if other in joins[session]) <= unit.parallel_batches - 1)
+
+    # Lectures of a unit go on different days and the tutorial avoids the lecture days
+    for unit in generator.units:
+        spread = [session for session in unit.sessions if session.component != "practical" and session in present]
+        for first, second in combinations(spread, 2):
+            if first.component == "lecture" or second.component == "lecture":
+                model.Add(day_vars[first] != day_vars[second]).OnlyEnforceIf([present[first], present[second]])
+
+    # Placing one more slot always outweighs any shift towards earlier starts
+    placed_weight = slots_per_day * len(present) + 1
+    model.Maximize(
+        sum(placed_weight * session.duration_slots * present[session] for session in present)
+        - sum(slot_vars[session] for session in present))
+
+    # Warm start from the greedy result, keeping only placements that are conflict-free in
+    # this model (the greedy pass books combined courses after checking only their first
+    # key). Lab batches sharing a slot join the first of them that was kept. The hint
+    # covers every variable so CP-SAT starts from a complete solution.
+    taken = set()
+    slot_leads = {}  # (unit, day, start_idx) -> [lead batch, batches joined]
+    for session in present:
+        placement = generator.placements.get(session)
+        cells = set()
+        joined = None
+        if placement is not None:
+            day, start_idx, rooms = placement
+            shared = slot_leads.get((session.unit, day, start_idx))
+            if session in leads and shared and shared[1] < session.unit.parallel_batches - 1:
+                joined = shared[0]
+            for idx in range(start_idx, start_idx + session.duration_slots):
+                if joined is None:
+                    cells.update((day, idx, "key", key) for key in session.unit.timetable_keys)
+                    cells.update((day, idx, "faculty", fid) for fid in session.unit.faculty)
+                cells.update((day, idx, "room", room) for room in rooms)
+        if placement is None or cells & taken:
+            (day_idx, start_idx), rooms, joined = divmod(slot_positions[session][0], slots_per_day), [], None
+        else:
+            taken |= cells
+            day_idx = days.index(day)
+            if joined is not None:
+                slot_leads[(session.unit, day, start_idx)][1] += 1
+            elif session in leads:
+                slot_leads[(session.unit, day, start_idx)] = [session, 0]
+        if session in leads:
+            model.AddHint(leads[session], bool(rooms) and joined is None)
+            for other, variable in joins[session].items():
+                model.AddHint(variable, other is joined)
+        model.AddHint(present[session], bool(rooms))
+        model.AddHint(day_vars[session], day_idx)
+        model.AddHint(slot_vars[session], start_idx)
+        model.AddHint(starts[session], day_idx * slots_per_day + start_idx)
+        for request_idx, choices in enumerate(room_choices[session]):
+            for candidate, chosen in choices.items():
+                model.AddHint(chosen, bool(rooms) and candidate == rooms[request_idx])
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = num_workers
+    if calendar["room"]:
+        # Probing the room choices restricted by calendar bookings can take the whole time
+        # limit in presolve before the search starts
+        solver.parameters.cp_model_probing_level = 0
+    # Without this presolve may drop the hinted solution and the search starts from scratch
+    solver.parameters.keep_all_feasible_solutions_in_presolve = True
+    status = solver.Solve(model)
+    logging.info(f"CP-SAT finished with status {solver.StatusName(status)} in {solver.WallTime():.2f}s")
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    placements = {}
+    for session, is_present in present.items():
+        if not solver.BooleanValue(is_present):
+            continue
+        day_idx, start_idx = divmod(solver.Value(starts[session]), slots_per_day)
+        rooms = [next(room for room, chosen in choices.items() if solver.BooleanValue(chosen))
+                 for choices in room_choices[session]]
+        placements[session] = (days[day_idx], start_idx, rooms)
+    return placements
@@ -0,0 +1,187 @@
+import heapq
+import logging
+from bisect import bisect_left
+from itertools import accumulate
+
+# Exam timetable (REQ-15) for TimetableGenerator.schedule_exams().
+#
+# Every distinct course code gets one exam, written by all sections that take the course.
+# Students are not listed individually, so they are modelled as cohorts: the core students
+# of a section, and per elective basket the students of that section who picked a course
+# from it. Two exams clash when they share a section and at least one of them is a core
+# course, or they are electives of the same section from different baskets (a student
+# takes one course per basket, so electives of one basket never clash). The clash graph
+# is a list of neighbour sets, built per section so its cost grows with the courses of
+# each section rather than with the number of students.
+#
+# The graph is coloured with DSatur: the exam with the most differently coloured
+# neighbours (then the most neighbours, then the most students) is coloured next, with the
+# lowest exam session free of its neighbours that still has seats for it. Sessions are
+# numbered day by day, so fewer colours means fewer exam days. Seating fills the rooms of
+# a session largest first: exams that need benches are seated one student per bench
+# (rooms.csv bench_capacity), the others in the remaining rooms at full capacity.
+
+exam_session_times = ["09:30-12:30", "14:30-17:30"]
+default_duration_minutes = 180
+
+
+class Exam:
+    __slots__ = ("code", "course_ids", "cohorts", "students", "duration_minutes", "requires_bench", "session")
+
+    def __init__(self, code):
+        self.code = code
+        self.course_ids = []
+        # section_id -> (basket or None for core students, students)
+        self.cohorts = {}
+        self.students = 0
+        self.duration_minutes = 0
+        self.requires_bench = False
+        self.session = None
+
+
+class SeatingPlan:
+    # Seating capacity of the exam rooms. Rooms are taken in decreasing bench capacity;
+    # bench exams fill a prefix of that order, the rest seat the other exams.
+
+    def __init__(self, rooms_df):
+        rooms = rooms_df.sort_values(["bench_capacity", "capacity"], ascending=False, kind="stable")
+        self.rooms = [str(room) for room in rooms["room_number"]]
+        self.benches = [int(value) for value in rooms["bench_capacity"].fillna(0)]
+        self.seats = [int(value) for value in rooms["capacity"]]
+        self.bench_prefix = list(accumulate(self.benches, initial=0))
+        self.seat_prefix = list(accumulate(self.seats, initial=0))
+
+    def fits(self, bench_students, plain_students):
+        # Rooms needed for the bench students, then whether the rest hold the others
+        rooms_used = bisect_left(self.bench_prefix, bench_students)
+        if rooms_used >= len(self.bench_prefix):
+            return False
+        return self.seat_prefix[-1] - self.seat_prefix[rooms_used] >= plain_students
+
+    def seat(self, exams):
+        # [(room, exam code, section_id, first seat, last seat)] for one session, and the
+        # number of students left without a seat
+        seating = []
+        position = 0
+        unseated = 0
+        for requires_bench in (True, False):
+            capacities = self.benches if requires_bench else self.seats
+            used = 0
+            for exam in exams:
+                if exam.requires_bench != requires_bench:
+                    continue
+                for section_id, (_, students) in exam.cohorts.items():
+                    while students and position < len(self.rooms):
+                        take = min(students, capacities[position] - used)
+                        if take > 0:
+                            seating.append((self.rooms[position], exam.code, section_id, used + 1, used + take))
+                            used += take
+                            students -= take
+                        if used >= capacities[position]:
+                            position += 1
+                            used = 0
+                    unseated += students
+            # Plain exams start in a fresh room after the bench rooms
+            if used:
+                position += 1
+        return seating, unseated
+
+
+def build_exams(generator):
+    # Exams by course code, with cohorts from the per-section enrollments and duration and
+    # bench requirement from exams.csv (courses missing there get the defaults)
+    settings = {int(record["course_id"]): record for record in generator.exams_df.to_dict("records")}
+    exams = {}
+    for course in generator.courses:
+        code = str(course.course_code).strip()
+        exam = exams.get(code)
+        if exam is None:
+            exam = exams[code] = Exam(code)
+        exam.course_ids.append(course.course_id)
+        setting = settings.get(course.course_id)
+        duration = default_duration_minutes if setting is None else int(setting["duration_minutes"])
+        exam.duration_minutes = max(exam.duration_minutes, duration)
+        exam.requires_bench |= setting is None or str(setting["requires_bench"]).upper() == "TRUE"
+        basket = (course.semester, course.basket_id) if course.is_elective and course.basket_id is not None else None
+        students = generator.section_enrollments.get((course.course_id, course.section_id), course.enrollment)
+        # A course listed twice for a section (e.g. pre- and post-midsem) is one cohort;
+        # core wins over elective since then every student of the section writes it
+        previous = exam.cohorts.get(course.section_id)
+        if previous is not None:
+            basket = None if previous[0] is None or basket is None else previous[0]
+            students = max(students, previous[1])
+        exam.cohorts[course.section_id] = (basket, students)
+    for exam in exams.values():
+        exam.students = sum(students for _, students in exam.cohorts.values())
+    return list(exams.values())
+
+
+def clash_graph(exams):
+    # neighbours[i]: indices of the exams that share students with exams[i]
+    by_section = {}
+    for number, exam in enumerate(exams):
+        for section_id, (basket, _) in exam.cohorts.items():
+            by_section.setdefault(section_id, []).append((number, basket))
+    neighbours = [set() for _ in exams]
+    for members in by_section.values():
+        for position, (first, first_basket) in enumerate(members):
+            for second, second_basket in members[position + 1:]:
+                if first_basket is None or second_basket is None or first_basket != second_basket:
+                    neighbours[first].add(second)
+                    neighbours[second].add(first)
+    return neighbours
+
+
+def color_exams(exams, neighbours, plan):
+    # DSatur with a seating check per session; sets exam.session and returns the number
+    # of sessions used
+    saturation = [set() for _ in exams]
+    load = []  # per session: [bench students, other students]
+    heap = [(0, -len(neighbours[number]), -exam.students, number) for number, exam in enumerate(exams)]
+    heapq.heapify(heap)
+    colored = 0
+    while colored < len(exams):
+        _, _, _, number = heapq.heappop(heap)
+        exam = exams[number]
+        if exam.session is not None:
+            continue  # stale entry, pushed before a neighbour raised its saturation
+        bench = exam.students if exam.requires_bench else 0
+        for session, (bench_load, plain_load) in enumerate(load):
+            if session not in saturation[number] and plan.fits(bench_load + bench, plain_load + exam.students - bench):
+                break
+        else:
+            session = len(load)
+            load.append([0, 0])
+            if not plan.fits(bench, exam.students - bench):
+                logging.warning(f"Exam {exam.code} has {exam.students} students, more than the exam rooms seat")
+        exam.session = session
+        load[session][0] += bench
+        load[session][1] += exam.students - bench
+        colored += 1
+        for other in neighbours[number]:
+            if exams[other].session is None and session not in saturation[other]:
+                saturation[other].add(session)
+                heapq.heappush(heap, (-len(saturation[other]), -len(neighbours[other]), -exams[other].students, other))
+    return len(load)
+
+
+def schedule_exams(generator):
+    # Exam timetable for the courses loaded by generator: a dict with the exams (each with
+    # its session), the sessions as (day number, time, [exams]) and per session the
+    # seating from SeatingPlan.seat
+    exams = build_exams(generator)
+    neighbours = clash_graph(exams)
+    plan = SeatingPlan(generator.rooms_df)
+    count = color_exams(exams, neighbours, plan)
+    sessions = []
+    for session in range(count):
+        day, part = divmod(session, len(exam_session_times))
+        members = [exam for exam in exams if exam.session == session]
+        seating, unseated = plan.seat(members)
+        if unseated:
+            logging.warning(f"{unseated} students of exam session {session + 1} have no seat")
+        sessions.append({"day": day + 1, "time": exam_session_times[part], "exams": members, "seating": seating})
+    days = -(-count // len(exam_session_times))
+    clashes = sum(len(others) for others in neighbours) // 2
+    logging.info(f"Scheduled {len(exams)} exams with {clashes} clashing pairs in {count} sessions over {days} days")
+    return {"exams": exams, "sessions": sessions, "days": days}
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import sqlite3
+
+# Faculty and room calendar shared by scheduler runs that are generated separately
+# (campuses, programmes, terms), so that a faculty member or room booked by one run is
+# busy for all the others. Used by TimetableGenerator.use_calendar().
+#
+# The SQLite file holds one occupancy bitmask per (kind, entity, day, owner), laid out
+# like TimetableGenerator.faculty_busy and room_busy: bit i is time_slots[i], and every
+# run sharing a file must use the same time slots. kind is "faculty" or "room" and
+# entities are stored JSON encoded, so faculty ids come back as ints. An owner is one
+# run's data set; a run replaces its own rows and only reads the other owners' rows.
+#
+# Runs do not hold a lock while they schedule. snapshot() reads the other owners' masks
+# once and merges them per (entity, day), so the scheduler's hot path stays a dict lookup
+# and a mask test. reserve() then checks the run's masks against the other owners again
+# and writes them in a single IMMEDIATE transaction, which SQLite serialises across
+# processes. If another run booked an overlapping slot in the meantime, nothing is
+# written and the conflicts are returned so the caller can reschedule against a fresh
+# snapshot.
+
+calendar_kinds = ("faculty", "room")
+
+
+class OccupancyStore:
+
+    def __init__(self, path, owner, time_slots, timeout=60.0):
+        if len(time_slots) > 62:
+            raise ValueError(f"{len(time_slots)} time slots do not fit the 64-bit masks of the calendar")
+        self.path = path
+        self.owner = owner
+        # Transactions are opened explicitly (BEGIN IMMEDIATE in reserve)
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS busy (kind TEXT, entity TEXT, day TEXT, owner TEXT, mask INTEGER, "
+                                "PRIMARY KEY (kind, entity, day, owner))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("INSERT OR IGNORE INTO meta VALUES ('time_slots', ?)", (";".join(time_slots),))
+        stored = self.connection.execute("SELECT value FROM meta WHERE key = 'time_slots'").fetchone()[0]
+        if stored != ";".join(time_slots):
+            raise ValueError(f"Calendar {path} uses the time slots {stored}, this run uses {';'.join(time_slots)}")
+
+    def others(self):
+        # {kind: {(entity, day): mask}} of every other owner, merged
+        busy = {kind: {} for kind in calendar_kinds}
+        rows = self.connection.execute("SELECT kind, entity, day, mask FROM busy WHERE owner != ?", (self.owner,))
+        for kind, entity, day, mask in rows:
+            key = (json.loads(entity), day)
+            busy[kind][key] = busy[kind].get(key, 0) | mask
+        return busy
+
+    def snapshot(self):
+        # The other owners' masks and a digest of them (part of the schedule cache key)
+        busy = self.others()
+        digest = hashlib.sha256(repr(sorted((kind, repr(key), mask) for kind in busy for key, mask in busy[kind].items())).encode())
+        return busy, digest.hexdigest()
+
+    def reserve(self, masks):
+        # Replace this owner's rows with masks ({kind: {(entity, day): mask}}) unless they
+        # overlap another owner's. Returns the overlaps as (kind, entity, day, slots mask);
+        # empty when the reservation was written.
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            busy = self.others()
+            conflicts = [(kind, entity, day, mask & busy[kind].get((entity, day), 0))
+                         for kind in calendar_kinds for (entity, day), mask in masks.get(kind, {}).items()
+                         if mask & busy[kind].get((entity, day), 0)]
+            if conflicts:
+                self.connection.execute("ROLLBACK")
+                return conflicts
+            self.connection.execute("DELETE FROM busy WHERE owner = ?", (self.owner,))
+            self.connection.executemany("INSERT INTO busy VALUES (?, ?, ?, ?, ?)",
+                                        [(kind, json.dumps(entity), day, self.owner, mask)
+                                         for kind in calendar_kinds for (entity, day), mask in masks.get(kind, {}).items() if mask])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+            raise
+        return []
+
+    def release(self):
+        # Drop this owner's reservation
+        self.connection.execute("DELETE FROM busy WHERE owner = ?", (self.owner,))
+
+    def close(self):
+        self.connection.close()
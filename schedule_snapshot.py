@@ -0,0 +1,187 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+# Compact binary snapshot of a generated timetable (TimetableGenerator.timetable and
+# room_schedule) that loads in milliseconds without re-running the scheduler.
+#
+# Layout, little-endian, every section starting on a 4-byte boundary:
+#   header   magic, version, then counts: days, slots, keys, rooms, entries, strings
+#   offsets  (strings + 1) x u32 byte offsets into the string blob
+#   cells    days x slots x keys x u32, 0 for an empty cell, else 1 + entry index
+#   rooms    days x slots x rooms x u8, 1 when the room is booked (padded to 4 bytes)
+#   strings  UTF-8 blob: day names, time slots, timetable keys, room numbers, one JSON
+#            object per distinct cell entry (interned, so a session spanning several
+#            slots and sections is stored once) and a final JSON object of metadata
+#
+# Snapshot maps the file and reads cells straight from it; entries are decoded on first use.
+
+MAGIC = b"TTSNAP\0\0"
+VERSION = 1
+HEADER = struct.Struct("<8s7I")
+
+
+def _aligned(size):
+    return (size + 3) & ~3
+
+
+def _u32_array(values):
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_snapshot(path, days, time_slots, timetable_keys, rooms, timetable, room_schedule, meta=None):
+    entry_index = {}
+    strings = [str(day) for day in days] + [str(slot) for slot in time_slots] + \
+              [str(key) for key in timetable_keys] + [str(room) for room in rooms]
+    cells = []
+    for day in days:
+        for slot in time_slots:
+            for key in timetable_keys:
+                entry = timetable[day][slot].get(key)
+                if not entry:
+                    cells.append(0)
+                    continue
+                text = json.dumps(entry, sort_keys=True, default=str)
+                if text not in entry_index:
+                    entry_index[text] = len(entry_index)
+                cells.append(entry_index[text] + 1)
+    strings += list(entry_index)
+    strings.append(json.dumps(meta or {}, default=str))
+
+    room_position = {str(room): idx for idx, room in enumerate(rooms)}
+    booked = bytearray(len(days) * len(time_slots) * len(rooms))
+    for day_idx, day in enumerate(days):
+        for slot_idx, slot in enumerate(time_slots):
+            base = (day_idx * len(time_slots) + slot_idx) * len(rooms)
+            for room, taken in room_schedule[day][slot].items():
+                if taken:
+                    booked[base + room_position[str(room)]] = 1
+
+    blob = bytearray()
+    offsets = [0]
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+
+    header = HEADER.pack(MAGIC, VERSION, len(days), len(time_slots), len(timetable_keys), len(rooms), len(entry_index), len(strings))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(_u32_array(offsets))
+        f.write(_u32_array(cells))
+        f.write(booked + bytes(_aligned(len(booked)) - len(booked)))
+        f.write(blob)
+    return path
+
+
+class Snapshot:
+    # Read side of write_snapshot. Usable as a context manager; the file stays mapped
+    # until close().
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_days, n_slots, n_keys, n_rooms, n_entries, n_strings = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a timetable snapshot")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported timetable snapshot version {version} in {path}")
+        self.shape = (n_days, n_slots, n_keys)
+        position = HEADER.size
+        self.offsets = self._u32_view(position, n_strings + 1)
+        position += 4 * (n_strings + 1)
+        self.cells = self._u32_view(position, n_days * n_slots * n_keys)
+        position += 4 * n_days * n_slots * n_keys
+        self.rooms_booked = memoryview(self.buffer)[position:position + n_days * n_slots * n_rooms]
+        self.strings_start = position + _aligned(n_days * n_slots * n_rooms)
+
+        names = [self.string(idx) for idx in range(n_days + n_slots + n_keys + n_rooms)]
+        self.days = names[:n_days]
+        self.time_slots = names[n_days:n_days + n_slots]
+        self.timetable_keys = names[n_days + n_slots:n_days + n_slots + n_keys]
+        self.rooms = names[n_days + n_slots + n_keys:]
+        self.entry_base = len(names)
+        self.entries = [None] * n_entries
+        self.meta = json.loads(self.string(n_strings - 1))
+
+    def _u32_view(self, position, count):
+        view = memoryview(self.buffer)[position:position + 4 * count]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        data = array("I", view.tobytes())
+        data.byteswap()
+        return data
+
+    def string(self, idx):
+        start = self.strings_start + self.offsets[idx]
+        return self.buffer[start:self.strings_start + self.offsets[idx + 1]].decode("utf-8")
+
+    def entry(self, day_idx, slot_idx, key_idx):
+        # Cell of timetable[day][slot][key] as a dict, or None when empty
+        n_days, n_slots, n_keys = self.shape
+        number = self.cells[(day_idx * n_slots + slot_idx) * n_keys + key_idx]
+        if not number:
+            return None
+        if self.entries[number - 1] is None:
+            self.entries[number - 1] = json.loads(self.string(self.entry_base + number - 1))
+        return self.entries[number - 1]
+
+    def timetable(self):
+        # Same nested layout as TimetableGenerator.timetable
+        return {
+            day: {
+                slot: {key: dict(self.entry(day_idx, slot_idx, key_idx) or {}) for key_idx, key in enumerate(self.timetable_keys)}
+                for slot_idx, slot in enumerate(self.time_slots)
+            }
+            for day_idx, day in enumerate(self.days)
+        }
+
+    def room_schedule(self):
+        # Same nested layout as TimetableGenerator.room_schedule
+        n_rooms = len(self.rooms)
+        schedule = {}
+        for day_idx, day in enumerate(self.days):
+            schedule[day] = {}
+            for slot_idx, slot in enumerate(self.time_slots):
+                base = (day_idx * len(self.time_slots) + slot_idx) * n_rooms
+                row = self.rooms_booked[base:base + n_rooms]
+                schedule[day][slot] = {room: True for room, taken in zip(self.rooms, row) if taken}
+        return schedule
+
+    def diff(self, other):
+        # Cells whose label differs between two snapshots with the same days, slots and keys:
+        # a list of (day, slot, key, old_label, new_label), None standing for an empty cell
+        if (self.days, self.time_slots, self.timetable_keys) != (other.days, other.time_slots, other.timetable_keys):
+            raise ValueError("Snapshots cover different days, time slots or timetable keys")
+        changes = []
+        n_days, n_slots, n_keys = self.shape
+        for position, (old, new) in enumerate(zip(self.cells, other.cells)):
+            if not old and not new:
+                continue
+            day_idx, rest = divmod(position, n_slots * n_keys)
+            slot_idx, key_idx = divmod(rest, n_keys)
+            old_label = (self.entry(day_idx, slot_idx, key_idx) or {}).get("label")
+            new_label = (other.entry(day_idx, slot_idx, key_idx) or {}).get("label")
+            if old_label != new_label:
+                changes.append((self.days[day_idx], self.time_slots[slot_idx], self.timetable_keys[key_idx], old_label, new_label))
+        return changes
+
+    def close(self):
+        for name in ("rooms_booked", "cells", "offsets"):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,118 @@
+import argparse
+import csv
+import os
+import random
+
+# Synthetic institute data for benchmarks: writes a data folder in the format of data/
+# (courses, rooms, sections, faculty, elective enrollments, assistants and config) at
+# `scale` times the size of the shipped dataset: 12 sections, 132 course rows, 30 rooms
+# and 46 faculty at scale 1.
+#
+# Every cohort (department, year, group) has one or two sections, five core courses with
+# LTPSC patterns drawn from the shipped data (the first one combined across the cohort's
+# sections) and two elective baskets of three courses whose students are split evenly
+# between the options. `tightness` scales demand against supply: rooms and faculty are
+# divided by it, so 1.0 matches the shipped ratio and 2.0 gives half the rooms and
+# faculty for the same courses.
+
+departments = {"CSE": "CS", "DSAI": "DS", "ECE": "EC"}
+years = [2, 4, 6]
+# (lecture, tutorial, practical, self study, credits) with their frequency in data/courses.csv
+ltpsc_patterns = [((3, 1, 0, 0, 4), 85), ((3, 1, 0, 0, 2), 74), ((3, 0, 0, 0, 3), 19), ((3, 0, 2, 0, 4), 12),
+                  ((3, 1, 2, 0, 5), 4), ((3, 0, 0, 4, 4), 3), ((1.5, 1, 0, 0, 2), 2), ((0, 2, 2, 0, 3), 2)]
+# Room mix of data/rooms.csv per 30 rooms: (type, capacity, bench capacity, count)
+room_mix = [("LECTURE_ROOM", 90, 23, 1), ("LECTURE_ROOM", 70, 18, 14), ("COMPUTER_LAB", 40, 10, 8),
+            ("HARDWARE_LAB", 40, 10, 4), ("SEATER_120", 120, 30, 2), ("SEATER_240", 240, 60, 1)]
+config = [("slot_duration_minutes", 30), ("morning_break_start", "10:30"), ("morning_break_duration_minutes", 15),
+          ("lunch_break_start", "13:30"), ("lunch_break_duration_minutes", 60), ("inter_class_break_minutes", 0),
+          ("mess_capacity", 200), ("teaching_assistant_threshold", 100),
+          ("scheduling_days", "Monday;Tuesday;Wednesday;Thursday;Friday"),
+          ("scheduling_hours_start", "09:00"), ("scheduling_hours_end", "17:00")]
+
+course_columns = ["course_id", "department", "semester", "course_code", "course_name", "lecture_hours", "tutorial_hours",
+                  "practical_hours", "self_study_hours", "credits", "faculty_ids", "is_elective", "basket_id", "combined",
+                  "enrollment", "section_id"]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate(data_dir, scale=1, tightness=1.0, seed=0):
+    # Write the CSV files into data_dir and return their row counts
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    patterns = [pattern for pattern, _ in ltpsc_patterns]
+    weights = [weight for _, weight in ltpsc_patterns]
+
+    faculty_count = max(4, round(46 * scale / tightness))
+    faculty = [(fid, f"Dr. Faculty {fid}") for fid in range(1, faculty_count + 1)]
+
+    rooms = []
+    for room_type, capacity, benches, count in room_mix:
+        for _ in range(max(1, round(count * scale / tightness))):
+            prefix = "L" if room_type.endswith("LAB") else "C" if room_type.startswith("SEATER") else ""
+            rooms.append((len(rooms) + 1, f"{prefix}{len(rooms) + 101}", capacity, room_type, benches))
+
+    sections, courses, enrollments = [], [], []
+    for group in range(scale):
+        for dept, prefix in departments.items():
+            for year in years:
+                semester = f"{year}_G{group + 1}"
+                cohort = []
+                for letter in "AB"[:2 if dept == "CSE" else 1]:
+                    section_id = len(sections) + 1
+                    strength = rng.randint(55, 90)
+                    sections.append((section_id, f"{dept}_{year}{letter}_G{group + 1}", 2024, dept, strength))
+                    cohort.append((section_id, strength))
+
+                def add_course(code, name, pattern, section_id, enrollment, faculty_ids, basket_id="", combined=False):
+                    courses.append([len(courses) + 1, dept, semester, code, name, *pattern, faculty_ids,
+                                    "TRUE" if basket_id else "FALSE", basket_id, "TRUE" if combined else "FALSE",
+                                    enrollment, section_id])
+
+                pick_faculty = lambda: str(rng.randint(1, faculty_count))
+                core = [(f"{prefix}{year}{group:03d}{number}", rng.choices(patterns, weights)[0], pick_faculty()) for number in range(5)]
+                for number, (code, pattern, faculty_ids) in enumerate(core):
+                    for section_id, strength in cohort:
+                        # Per-section faculty for split courses, one shared faculty for the combined one
+                        fid = faculty_ids if number == 0 or len(cohort) == 1 else pick_faculty()
+                        add_course(code, f"Course {code}", pattern, section_id, strength, fid, combined=number == 0 and len(cohort) > 1)
+                for basket in ("B1", "B2"):
+                    pattern = rng.choices(patterns[:3], weights[:3])[0]
+                    options = [(f"EL{year}{group:03d}{dept[0]}{basket[1]}{option}", pick_faculty()) for option in range(3)]
+                    for section_id, strength in cohort:
+                        for code, faculty_ids in options:
+                            add_course(code, f"Elective {code}", pattern, section_id, strength // 3, faculty_ids, basket)
+                            enrollments.append((section_id, len(courses), strength // 3))
+
+    assistants = [(number, f"Assistant {number}", rng.randint(1, len(courses)), rng.choice(config[8][1].split(";")),
+                   "09:00", "13:00", rng.choice(["TRUE", "FALSE"])) for number in range(1, 3 * scale + 1)]
+
+    write_csv(os.path.join(data_dir, "courses.csv"), course_columns, courses)
+    write_csv(os.path.join(data_dir, "rooms.csv"), ["room_id", "room_number", "capacity", "type", "bench_capacity"], rooms)
+    write_csv(os.path.join(data_dir, "sections.csv"), ["section_id", "batch_name", "year", "department", "strength"], sections)
+    write_csv(os.path.join(data_dir, "faculty.csv"), ["faculty_id", "faculty_name"], faculty)
+    write_csv(os.path.join(data_dir, "elective_enrollments.csv"), ["section_id", "course_id", "enrollment"], enrollments)
+    write_csv(os.path.join(data_dir, "assistants.csv"), ["assistant_id", "assistant_name", "course_id", "preference_day",
+                                                         "preference_start_time", "preference_end_time", "is_lab_eligible"], assistants)
+    write_csv(os.path.join(data_dir, "config.csv"), ["parameter", "value"], config)
+    return {"courses": len(courses), "sections": len(sections), "rooms": len(rooms), "faculty": len(faculty)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic institute data folder for benchmarking.")
+    parser.add_argument("data_dir", help="folder to write the CSV files to")
+    parser.add_argument("--scale", type=int, default=1, help="size relative to the shipped data (default: 1)")
+    parser.add_argument("--tightness", type=float, default=1.0, help="demand relative to rooms and faculty (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+    counts = generate(args.data_dir, args.scale, args.tightness, args.seed)
+    print(f"Wrote {', '.join(f'{count} {name}' for name, count in counts.items())} to {args.data_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,28 @@
 import pandas as pd
 import os
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, Border, Side, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, Border, Side, PatternFill, NamedStyle
+from openpyxl.utils import get_column_letter
 import random
 import logging
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Ensure output directory exists
-output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-# Read CSV files from the 'data' folder
-courses_df = pd.read_csv("data/courses.csv")
-config_df = pd.read_csv("data/config.csv").set_index("parameter")["value"]
-rooms_df = pd.read_csv("data/rooms.csv")
-sections_df = pd.read_csv("data/sections.csv")
-faculty_df = pd.read_csv("data/faculty.csv")
-assistants_df = pd.read_csv("data/assistants.csv")
-elective_enrollments_df = pd.read_csv("data/elective_enrollments.csv").dropna()
-
-# Extract configuration parameters
-slot_duration = int(config_df["slot_duration_minutes"])  # 30 minutes
-scheduling_days = config_df["scheduling_days"].split(";")
-ta_threshold = int(config_df["teaching_assistant_threshold"])
-
-# Define time slots (30-minute increments from 9:00 to 19:30)
-start_time = datetime.strptime("09:00", "%H:%M")
-end_time = datetime.strptime("19:30", "%H:%M")
-time_slots = []
-current_time = start_time
-while current_time.time() <= end_time.time():
-    time_slots.append(current_time.time().strftime("%H:%M"))
-    current_time += timedelta(minutes=slot_duration)
+import importlib
+import json
+import hashlib
+import shutil
+import time
+import cProfile
+from bisect import bisect_left
+from functools import lru_cache
+from contextlib import contextmanager
+from schedule_snapshot import Snapshot, write_snapshot
+import exam_scheduler
+import assistant_allocator
+from occupancy_store import OccupancyStore
 
 # Define display slots (up to 19:30)
 display_slots = [
@@ -53,669 +41,33 @@ lunch_schedule = {
     "ECE": {"start": datetime.strptime("13:30", "%H:%M").time(), "end": datetime.strptime("15:00", "%H:%M").time()}
 }
 
-# Get unique semesters by department
-semesters_by_dept = {
-    "CSE": sorted(courses_df[courses_df["department"] == "CSE"]["semester"].unique()),
-    "DSAI": sorted(courses_df[courses_df["department"] == "DSAI"]["semester"].unique()),
-    "ECE": sorted(courses_df[courses_df["department"] == "ECE"]["semester"].unique()),
-}
-
-# Create a list of all timetable keys (dept_semester_section)
-timetable_keys = []
-for dept, semesters in semesters_by_dept.items():
-    for semester in semesters:
-        semester_courses = courses_df[(courses_df["department"] == dept) & (courses_df["semester"] == semester)]
-        for section_id in semester_courses["section_id"].unique():
-            key = f"{dept}_{semester}_{section_id}"
-            timetable_keys.append(key)
-
-# Initialize 3D schedule array: schedule[day][time_slot][timetable_key]
-schedule = {
-    day: {
-        slot: {key: {} for key in timetable_keys}
-        for slot in time_slots
-    }
-    for day in scheduling_days
-}
-
-# Track room usage to avoid conflicts: room_schedule[day][time_slot][room_number]
-room_schedule = {
-    day: {
-        slot: {}
-        for slot in time_slots
-    }
-    for day in scheduling_days
-}
-
 # Define colors for courses and baskets
 color_palette = [
     "FFC1CC", "CCE5FF", "CCFFCC", "FFCC99", "E6CCFF", "FFFFCC",
     "FF9999", "99CCFF", "99FF99", "FFCC66", "CC99FF", "66CCCC",
     "FF66CC", "99CCCC", "FF9966", "CCCCFF"
 ]
-course_colors = {}
 
-def assign_color(identifier):
-    if identifier not in course_colors:
-        course_colors[identifier] = random.choice(color_palette)
-    return course_colors[identifier]
+# Room types that can host lectures and tutorials
+lecture_room_types = ["LECTURE_ROOM", "SEATER_120", "SEATER_240"]
 
-# Helper functions
-def get_faculty_name(faculty_ids):
-    if pd.isna(faculty_ids):
-        return "TBD"
-    faculty_ids = str(faculty_ids).split(";")
-    names = [faculty_df[faculty_df["faculty_id"] == int(fid)]["faculty_name"].iloc[0] for fid in faculty_ids if fid]
-    return ", ".join(names)
-
-def assign_room(enrollment, component_type, dept, course_code, day, start_slot, duration_slots):
-    # Determine room type based on component
-    if component_type == "practical":
-        room_type = "COMPUTER_LAB" if "CS" in course_code or "DS" in course_code else "HARDWARE_LAB"
-        available_rooms = rooms_df[(rooms_df["type"] == room_type) & (rooms_df["capacity"] >= min(enrollment, 40))]
-    else:
-        available_rooms = rooms_df[rooms_df["type"].isin(["LECTURE_ROOM", "SEATER_120", "SEATER_240"]) & (rooms_df["capacity"] >= enrollment)]
-    
-    if available_rooms.empty:
-        logging.warning(f"No rooms available for {course_code} ({component_type}) with enrollment {enrollment}")
-        return None
-    
-    # Sort rooms by capacity to minimize over-allocation
-    available_rooms = available_rooms.sort_values(by="capacity")
-    
-    start_idx = time_slots.index(start_slot)
-    slots_to_check = time_slots[start_idx:start_idx + duration_slots]
-    
-    for _, room in available_rooms.iterrows():
-        room_number = room["room_number"]
-        room_available = True
-        for slot in slots_to_check:
-            if room_schedule[day][slot].get(room_number):
-                room_available = False
-                break
-        if room_available:
-            for slot in slots_to_check:
-                room_schedule[day][slot][room_number] = True
-            return room_number
-    logging.warning(f"No available room slots for {course_code} ({component_type}) on {day} at {start_slot}")
-    return None
-
-def is_slot_available(day, start_slot, duration_slots, timetable_key, faculty_ids, section_id, dept):
-    start_time = datetime.strptime(start_slot, "%H:%M").time()
-    end_time = (datetime.strptime(start_slot, "%H:%M") + timedelta(minutes=slot_duration * duration_slots)).time()
-    lunch_start = lunch_schedule[dept]["start"]
-    lunch_end = lunch_schedule[dept]["end"]
-    
-    # Check for breaks
-    if (start_time >= morning_break_start and start_time < morning_break_end) or \
-       (end_time > morning_break_start and end_time <= morning_break_end) or \
-       (start_time >= lunch_start and start_time < lunch_end) or \
-       (end_time > lunch_start and end_time <= lunch_end):
-        return False
-    
-    start_idx = time_slots.index(start_slot)
-    if start_idx + duration_slots > len(time_slots):
-        return False
-    
-    slots_to_check = time_slots[start_idx:start_idx + duration_slots]
-    
-    # Check for slot conflicts in the current timetable
-    faculty_ids = set(str(faculty_ids).split(";")) if not pd.isna(faculty_ids) else set()
-    for slot in slots_to_check:
-        slot_schedule = schedule[day][slot]
-        if slot_schedule[timetable_key]:
-            return False
-        
-        # Check for faculty conflicts across all timetables
-        for key in timetable_keys:
-            if key == timetable_key:
-                continue
-            if slot_schedule[key]:
-                other_faculty = set(str(slot_schedule[key].get("faculty_ids", "")).split(";"))
-                if faculty_ids & other_faculty:
-                    logging.debug(f"Faculty conflict detected for faculty {faculty_ids & other_faculty} on {day} at {slot}")
-                    return False
-    return True
-
-def get_available_slots(day, duration_slots, timetable_key, faculty_ids, section_id, dept):
-    available_slots = []
-    for start_slot in time_slots[:-duration_slots + 1]:
-        if is_slot_available(day, start_slot, duration_slots, timetable_key, faculty_ids, section_id, dept):
-            available_slots.append(start_slot)
-    # Sort slots by start time (left-skewed allocation)
-    available_slots.sort(key=lambda slot: datetime.strptime(slot, "%H:%M"))
-    return available_slots
-
-# Handle electives: group by basket
-basket_courses = {}
-for _, course in courses_df.iterrows():
-    if course["is_elective"] and pd.notna(course["basket_id"]):
-        basket_id = course["basket_id"]
-        key = (course["department"], course["semester"], basket_id)
-        if key not in basket_courses:
-            basket_courses[key] = []
-        basket_courses[key].append(course)
-
-# Log the detected elective baskets
-logging.info("Detected elective baskets:")
-for key, courses in basket_courses.items():
-    dept, semester, basket_id = key
-    course_codes = [course["course_code"] for course in courses]
-    logging.info(f" - {basket_id} in {dept} semester {semester}: {course_codes}")
-
-# Process baskets (schedule only one representative course per basket)
-basket_schedules = {}
-for key, courses in basket_courses.items():
-    dept, semester, basket_id = key
-    # Use the LTPSC of the first course since all courses in the basket have the same LTPSC
-    standard_ltpsc = (courses[0]["lecture_hours"], courses[0]["tutorial_hours"], courses[0]["practical_hours"], courses[0]["self_study_hours"], courses[0]["credits"])
-    basket_schedules[key] = {
-        "ltpsc": standard_ltpsc,
-        "courses": [],
-        "representative_course": courses[0]  # Pick the first course as representative
-    }
-    for course in courses:
-        basket_schedules[key]["courses"].append({
-            "course": course,
-            "timetable_key": f"{course['department']}_{course['semester']}_{course['section_id']}",
-            "enrollment": elective_enrollments_df[
-                (elective_enrollments_df["course_id"] == course["course_id"]) &
-                (elective_enrollments_df["section_id"] == course["section_id"])
-            ]["enrollment"].iloc[0] if not elective_enrollments_df[
-                (elective_enrollments_df["course_id"] == course["course_id"]) &
-                (elective_enrollments_df["section_id"] == course["section_id"])
-            ].empty else course["enrollment"]
-        })
+# Optional exact scheduling backends: name -> module exposing solve(generator, time_limit),
+# which returns {session: (day, start_idx, rooms)} or None. Imported only when selected.
+exact_backends = {"cpsat": "cpsat_backend"}
 
-# Calculate total items for progress tracking (one per basket + non-elective courses)
-total_items = len(courses_df[courses_df["is_elective"] == False]) + len(basket_schedules)
-items_processed = 0
-
-# Group combined courses
-combined_courses = {}
-for _, course in courses_df.iterrows():
-    if course["combined"]:
-        course_key = (course["course_code"], course["faculty_ids"])
-        if course_key not in combined_courses:
-            combined_courses[course_key] = []
-        combined_courses[course_key].append({
-            "course": course,
-            "timetable_key": f"{course['department']}_{course['semester']}_{course['section_id']}",
-            "enrollment": course["enrollment"]
-        })
+# Counters kept in TimetableGenerator.metrics: start slots tested by the availability check,
+# rooms tested by assign_room, slots tried by find_placement, partial room assignments
+# rolled back, sessions find_placement could not place, calendar conflicts found when
+# reserving, and lab batches placed alongside another batch of the same practical
+metric_counters = ["availability_probes", "room_probes", "placement_attempts", "rollbacks", "failures", "calendar_conflicts",
+                   "parallel_batches"]
 
-# Store elective scheduling details for output
-elective_details = []
-
-# Schedule combined courses first
-max_attempts = 100
-logging.info("Starting to schedule combined courses")
-for (course_code, faculty_ids), instances in combined_courses.items():
-    total_enrollment = sum(instance["enrollment"] for instance in instances)
-    course = instances[0]["course"]
-    timetable_keys_for_course = [instance["timetable_key"] for instance in instances]
-    dept = course["department"]
-    
-    logging.info(f"Scheduling combined course {course_code} for {len(timetable_keys_for_course)} sections")
-    
-    lecture_slots = 3 if course["lecture_hours"] >= 1.5 else 2
-    lecture_sessions = 2 if course["lecture_hours"] == 3 else 1
-    tutorial_slots = 2 if course["tutorial_hours"] > 0 else 0
-    practical_slots = 4 if course["practical_hours"] > 0 else 0
-    
-    # Schedule practicals first
-    if practical_slots > 0:
-        lab_capacity = rooms_df[rooms_df["type"].isin(["COMPUTER_LAB", "HARDWARE_LAB"])]["capacity"].min()
-        batches = max(1, int(total_enrollment / lab_capacity) + (1 if total_enrollment % lab_capacity else 0))
-        for batch in range(batches):
-            attempts = 0
-            scheduled = False
-            for day in scheduling_days:
-                available_slots = get_available_slots(day, practical_slots, timetable_keys_for_course[0], faculty_ids, course["section_id"], dept)
-                for start_slot in available_slots:
-                    attempts += 1
-                    logging.info(f"Attempt {attempts} to schedule practical (Batch {chr(65+batch)}) for {course_code} on {day} at {start_slot}")
-                    room = assign_room(min(total_enrollment, lab_capacity), "practical", dept, course_code, day, start_slot, practical_slots)
-                    if room:
-                        start_idx = time_slots.index(start_slot)
-                        for idx in range(start_idx, start_idx + practical_slots):
-                            slot = time_slots[idx]
-                            for key in timetable_keys_for_course:
-                                schedule[day][slot][key] = {
-                                    "label": f"{course_code} (LAB) (Batch {chr(65+batch)})\n{room}",
-                                    "course_code": course_code,
-                                    "faculty_ids": faculty_ids,
-                                    "section_id": course["section_id"],
-                                    "component": "practical"
-                                }
-                        logging.info(f"Successfully scheduled practical (Batch {chr(65+batch)}) for {course_code} on {day} at {start_slot}")
-                        scheduled = True
-                        break
-                if scheduled:
-                    break
-            if not scheduled:
-                logging.warning(f"Failed to schedule practical (Batch {chr(65+batch)}) for combined course {course_code} after {attempts} attempts")
-    
-    # Schedule lecture sessions
-    lecture_days = []
-    for session in range(lecture_sessions):
-        attempts = 0
-        scheduled = False
-        for day in scheduling_days:
-            if day in lecture_days:
-                continue
-            available_slots = get_available_slots(day, lecture_slots, timetable_keys_for_course[0], faculty_ids, course["section_id"], dept)
-            for start_slot in available_slots:
-                attempts += 1
-                logging.info(f"Attempt {attempts} to schedule lecture session {session+1} for {course_code} on {day} at {start_slot}")
-                room = assign_room(total_enrollment, "lecture", dept, course_code, day, start_slot, lecture_slots)
-                if room:
-                    start_idx = time_slots.index(start_slot)
-                    for idx in range(start_idx, start_idx + lecture_slots):
-                        slot = time_slots[idx]
-                        for key in timetable_keys_for_course:
-                            schedule[day][slot][key] = {
-                                "label": f"{course_code} (L)\n{room}",
-                                "course_code": course_code,
-                                "faculty_ids": faculty_ids,
-                                "section_id": course["section_id"],
-                                "component": "lecture"
-                            }
-                    lecture_days.append(day)
-                    logging.info(f"Successfully scheduled lecture session {session+1} for {course_code} on {day} at {start_slot}")
-                    scheduled = True
-                    break
-            if scheduled:
-                break
-        if not scheduled:
-            logging.warning(f"Failed to schedule lecture session {session+1} for combined course {course_code} after {attempts} attempts")
-    
-    # Schedule tutorial
-    if tutorial_slots > 0:
-        attempts = 0
-        scheduled = False
-        for day in scheduling_days:
-            if day in lecture_days:
-                continue
-            available_slots = get_available_slots(day, tutorial_slots, timetable_keys_for_course[0], faculty_ids, course["section_id"], dept)
-            for start_slot in available_slots:
-                attempts += 1
-                logging.info(f"Attempt {attempts} to schedule tutorial for {course_code} on {day} at {start_slot}")
-                room = assign_room(total_enrollment, "tutorial", dept, course_code, day, start_slot, tutorial_slots)
-                if room:
-                    start_idx = time_slots.index(start_slot)
-                    for idx in range(start_idx, start_idx + tutorial_slots):
-                        slot = time_slots[idx]
-                        for key in timetable_keys_for_course:
-                            schedule[day][slot][key] = {
-                                "label": f"{course_code} (T)\n{room}",
-                                "course_code": course_code,
-                                "faculty_ids": faculty_ids,
-                                "section_id": course["section_id"],
-                                "component": "tutorial"
-                            }
-                    logging.info(f"Successfully scheduled tutorial for {course_code} on {day} at {start_slot}")
-                    scheduled = True
-                    break
-            if scheduled:
-                break
-        if not scheduled:
-            logging.warning(f"Failed to schedule tutorial for combined course {course_code} after {attempts} attempts")
-    
-    items_processed += 1
-    progress = (items_processed / total_items) * 100
-    logging.info(f"Progress: {items_processed}/{total_items} items scheduled ({progress:.2f}%)")
-
-# Schedule elective baskets (schedule only one representative course per basket)
-logging.info("Starting to schedule elective baskets")
-for key, basket_data in basket_schedules.items():
-    dept, semester, basket_id = key
-    ltpsc = basket_data["ltpsc"]
-    courses = basket_data["courses"]
-    representative_course = basket_data["representative_course"]
-    timetable_keys_for_basket = [course["timetable_key"] for course in courses]
-    faculty_ids_set = set()
-    for course_data in courses:
-        course = course_data["course"]
-        if not pd.isna(course["faculty_ids"]):
-            faculty_ids_set.update(str(course["faculty_ids"]).split(";"))
-    
-    logging.info(f"Scheduling elective basket {basket_id} in {dept} semester {semester} with LTPSC {ltpsc}")
-    
-    lecture_slots = 3 if ltpsc[0] >= 1.5 else 2
-    lecture_sessions = 2 if ltpsc[0] == 3 else 1
-    tutorial_slots = 2 if ltpsc[1] > 0 else 0
-    practical_slots = 4 if ltpsc[2] > 0 else 0
-    
-    # Schedule practicals first
-    practical_time_slots = []
-    if practical_slots > 0:
-        lab_capacity = rooms_df[rooms_df["type"].isin(["COMPUTER_LAB", "HARDWARE_LAB"])]["capacity"].min()
-        max_enrollment = max(course["enrollment"] for course in courses)
-        batches = max(1, int(max_enrollment / lab_capacity) + (1 if max_enrollment % lab_capacity else 0))
-        for batch in range(batches):
-            attempts = 0
-            scheduled = False
-            for day in scheduling_days:
-                available_slots = get_available_slots(day, practical_slots, timetable_keys_for_basket[0], ";".join(faculty_ids_set), representative_course["section_id"], dept)
-                for start_slot in available_slots:
-                    attempts += 1
-                    logging.info(f"Attempt {attempts} to schedule practical (Batch {chr(65+batch)}) for basket {basket_id} on {day} at {start_slot}")
-                    rooms = {}
-                    for course_data in courses:
-                        course = course_data["course"]
-                        enrollment = course_data["enrollment"]
-                        room = assign_room(min(enrollment, lab_capacity), "practical", dept, course["course_code"], day, start_slot, practical_slots)
-                        if room:
-                            rooms[course["course_code"]] = room
-                        else:
-                            # Rollback room assignments if any course fails
-                            for slot in time_slots[time_slots.index(start_slot):time_slots.index(start_slot) + practical_slots]:
-                                for r in rooms.values():
-                                    if room_schedule[day][slot].get(r):
-                                        del room_schedule[day][slot][r]
-                            break
-                    if len(rooms) == len(courses):
-                        start_idx = time_slots.index(start_slot)
-                        time_slot_range = f"{start_slot}-{time_slots[start_idx + practical_slots - 1]}"
-                        practical_time_slots.append((day, time_slot_range))
-                        room_assignments = "\n".join([f"{course_code}-{room}" for course_code, room in rooms.items()])
-                        for idx in range(start_idx, start_idx + practical_slots):
-                            slot = time_slots[idx]
-                            for key in timetable_keys_for_basket:
-                                schedule[day][slot][key] = {
-                                    "label": f"{basket_id} (LAB) (Batch {chr(65+batch)})\n{room_assignments}",
-                                    "course_code": basket_id,
-                                    "faculty_ids": ";".join(faculty_ids_set),
-                                    "section_id": representative_course["section_id"],
-                                    "component": "practical"
-                                }
-                        for course_data in courses:
-                            course = course_data["course"]
-                            elective_details.append({
-                                "Basket ID": basket_id,
-                                "Course Name": course["course_code"],
-                                "Faculty": get_faculty_name(course["faculty_ids"]),
-                                "Room": rooms[course["course_code"]],
-                                "Time Slot": f"LAB (Batch {chr(65+batch)}): {day} {time_slot_range}",
-                                "LTPSC": f"{ltpsc[0]}-{ltpsc[1]}-{ltpsc[2]}-{ltpsc[3]}-{ltpsc[4]}",
-                                "Extra Sessions": ""
-                            })
-                        logging.info(f"Successfully scheduled practical (Batch {chr(65+batch)}) for basket {basket_id} on {day} at {start_slot}")
-                        scheduled = True
-                        break
-                if scheduled:
-                    break
-            if not scheduled:
-                logging.warning(f"Failed to schedule practical (Batch {chr(65+batch)}) for basket {basket_id} after {attempts} attempts")
-    
-    # Schedule lecture sessions
-    lecture_days = []
-    lecture_time_slots = []
-    for session in range(lecture_sessions):
-        attempts = 0
-        scheduled = False
-        for day in scheduling_days:
-            if day in lecture_days:
-                continue
-            available_slots = get_available_slots(day, lecture_slots, timetable_keys_for_basket[0], ";".join(faculty_ids_set), representative_course["section_id"], dept)
-            for start_slot in available_slots:
-                attempts += 1
-                logging.info(f"Attempt {attempts} to schedule lecture session {session+1} for basket {basket_id} on {day} at {start_slot}")
-                rooms = {}
-                for course_data in courses:
-                    course = course_data["course"]
-                    enrollment = course_data["enrollment"]
-                    room = assign_room(enrollment, "lecture", dept, course["course_code"], day, start_slot, lecture_slots)
-                    if room:
-                        rooms[course["course_code"]] = room
-                    else:
-                        for slot in time_slots[time_slots.index(start_slot):time_slots.index(start_slot) + lecture_slots]:
-                            for r in rooms.values():
-                                if room_schedule[day][slot].get(r):
-                                    del room_schedule[day][slot][r]
-                        break
-                if len(rooms) == len(courses):
-                    start_idx = time_slots.index(start_slot)
-                    time_slot_range = f"{start_slot}-{time_slots[start_idx + lecture_slots - 1]}"
-                    lecture_time_slots.append((day, time_slot_range))
-                    room_assignments = "\n".join([f"{course_code}-{room}" for course_code, room in rooms.items()])
-                    for idx in range(start_idx, start_idx + lecture_slots):
-                        slot = time_slots[idx]
-                        for key in timetable_keys_for_basket:
-                            schedule[day][slot][key] = {
-                                "label": f"{basket_id} (L)\n{room_assignments}",
-                                "course_code": basket_id,
-                                "faculty_ids": ";".join(faculty_ids_set),
-                                "section_id": representative_course["section_id"],
-                                "component": "lecture"
-                            }
-                    for course_data in courses:
-                        course = course_data["course"]
-                        entry_exists = False
-                        for detail in elective_details:
-                            if detail["Course Name"] == course["course_code"] and detail["Basket ID"] == basket_id:
-                                detail["Time Slot"] = f"L: {day} {time_slot_range}, " + detail["Time Slot"]
-                                entry_exists = True
-                                break
-                        if not entry_exists:
-                            elective_details.append({
-                                "Basket ID": basket_id,
-                                "Course Name": course["course_code"],
-                                "Faculty": get_faculty_name(course["faculty_ids"]),
-                                "Room": rooms[course["course_code"]],
-                                "Time Slot": f"L: {day} {time_slot_range}",
-                                "LTPSC": f"{ltpsc[0]}-{ltpsc[1]}-{ltpsc[2]}-{ltpsc[3]}-{ltpsc[4]}",
-                                "Extra Sessions": ""
-                            })
-                    lecture_days.append(day)
-                    logging.info(f"Successfully scheduled lecture session {session+1} for basket {basket_id} on {day} at {start_slot}")
-                    scheduled = True
-                    break
-            if scheduled:
-                break
-        if not scheduled:
-            logging.warning(f"Failed to schedule lecture session {session+1} for basket {basket_id} after {attempts} attempts")
-    
-    # Schedule tutorial
-    tutorial_time_slots = []
-    if tutorial_slots > 0:
-        attempts = 0
-        scheduled = False
-        for day in scheduling_days:
-            if day in lecture_days:
-                continue
-            available_slots = get_available_slots(day, tutorial_slots, timetable_keys_for_basket[0], ";".join(faculty_ids_set), representative_course["section_id"], dept)
-            for start_slot in available_slots:
-                attempts += 1
-                logging.info(f"Attempt {attempts} to schedule tutorial for basket {basket_id} on {day} at {start_slot}")
-                rooms = {}
-                for course_data in courses:
-                    course = course_data["course"]
-                    enrollment = course_data["enrollment"]
-                    room = assign_room(enrollment, "tutorial", dept, course["course_code"], day, start_slot, tutorial_slots)
-                    if room:
-                        rooms[course["course_code"]] = room
-                    else:
-                        for slot in time_slots[time_slots.index(start_slot):time_slots.index(start_slot) + tutorial_slots]:
-                            for r in rooms.values():
-                                if room_schedule[day][slot].get(r):
-                                    del room_schedule[day][slot][r]
-                        break
-                if len(rooms) == len(courses):
-                    start_idx = time_slots.index(start_slot)
-                    time_slot_range = f"{start_slot}-{time_slots[start_idx + tutorial_slots - 1]}"
-                    tutorial_time_slots.append((day, time_slot_range))
-                    room_assignments = "\n".join([f"{course_code}-{room}" for course_code, room in rooms.items()])
-                    for idx in range(start_idx, start_idx + tutorial_slots):
-                        slot = time_slots[idx]
-                        for key in timetable_keys_for_basket:
-                            schedule[day][slot][key] = {
-                                "label": f"{basket_id} (T)\n{room_assignments}",
-                                "course_code": basket_id,
-                                "faculty_ids": ";".join(faculty_ids_set),
-                                "section_id": representative_course["section_id"],
-                                "component": "tutorial"
-                            }
-                    for detail in elective_details:
-                        if detail["Basket ID"] == basket_id:
-                            detail["Time Slot"] += f", T: {day} {time_slot_range}"
-                    logging.info(f"Successfully scheduled tutorial for basket {basket_id} on {day} at {start_slot}")
-                    scheduled = True
-                    break
-            if scheduled:
-                break
-        if not scheduled:
-            logging.warning(f"Failed to schedule tutorial for basket {basket_id} after {attempts} attempts")
-    
-    items_processed += 1
-    progress = (items_processed / total_items) * 100
-    logging.info(f"Progress: {items_processed}/{total_items} items scheduled ({progress:.2f}%)")
-
-# Schedule non-elective, non-combined courses
-logging.info("Starting to schedule non-elective, non-combined courses")
-processed_basket_ids = set()
-for dept, semesters in semesters_by_dept.items():
-    logging.info(f"Processing department: {dept}")
-    for semester in semesters:
-        logging.info(f"Processing semester: {semester}")
-        semester_courses = courses_df[(courses_df["department"] == dept) & (courses_df["semester"] == semester)]
-        for section_id in semester_courses["section_id"].unique():
-            timetable_key = f"{dept}_{semester}_{section_id}"
-            logging.info(f"Processing section: {timetable_key}")
-            section_courses = semester_courses[semester_courses["section_id"] == section_id]
-            for _, course in section_courses.iterrows():
-                # Skip combined courses
-                if course["combined"]:
-                    continue
-                # Handle elective courses
-                if course["is_elective"]:
-                    basket_id = course["basket_id"]
-                    if pd.isna(basket_id) or basket_id in processed_basket_ids:
-                        continue
-                    processed_basket_ids.add(basket_id)
-                    continue  # Skip since we already scheduled the basket
-                # Schedule non-elective course
-                course_code = course["course_code"]
-                logging.info(f"Scheduling course: {course_code}")
-                enrollment = course["enrollment"]
-                
-                lecture_slots = 3 if course["lecture_hours"] >= 1.5 else 2
-                lecture_sessions = 2 if course["lecture_hours"] == 3 else 1
-                tutorial_slots = 2 if course["tutorial_hours"] > 0 else 0
-                practical_slots = 4 if course["practical_hours"] > 0 else 0
-                
-                # Schedule practicals first
-                if practical_slots > 0:
-                    lab_capacity = rooms_df[rooms_df["type"].isin(["COMPUTER_LAB", "HARDWARE_LAB"])]["capacity"].min()
-                    batches = max(1, int(enrollment / lab_capacity) + (1 if enrollment % lab_capacity else 0))
-                    for batch in range(batches):
-                        attempts = 0
-                        scheduled = False
-                        for day in scheduling_days:
-                            available_slots = get_available_slots(day, practical_slots, timetable_key, course["faculty_ids"], section_id, dept)
-                            for start_slot in available_slots:
-                                attempts += 1
-                                logging.info(f"Attempt {attempts} to schedule practical (Batch {chr(65+batch)}) for {course_code} on {day} at {start_slot}")
-                                room = assign_room(min(enrollment, lab_capacity), "practical", dept, course["course_code"], day, start_slot, practical_slots)
-                                if room:
-                                    start_idx = time_slots.index(start_slot)
-                                    for idx in range(start_idx, start_idx + practical_slots):
-                                        slot = time_slots[idx]
-                                        schedule[day][slot][timetable_key] = {
-                                            "label": f"{course['course_code']} (LAB) (Batch {chr(65+batch)})\n{room}",
-                                            "course_code": course["course_code"],
-                                            "faculty_ids": course["faculty_ids"],
-                                            "section_id": section_id,
-                                            "component": "practical"
-                                        }
-                                    logging.info(f"Successfully scheduled practical (Batch {chr(65+batch)}) for {course_code} on {day} at {start_slot}")
-                                    scheduled = True
-                                    break
-                            if scheduled:
-                                break
-                        if not scheduled:
-                            logging.warning(f"Failed to schedule practical (Batch {chr(65+batch)}) for course {course_code} in {timetable_key} after {attempts} attempts")
-                
-                # Schedule lecture sessions
-                lecture_days = []
-                for session in range(lecture_sessions):
-                    attempts = 0
-                    scheduled = False
-                    for day in scheduling_days:
-                        if day in lecture_days:
-                            continue
-                        available_slots = get_available_slots(day, lecture_slots, timetable_key, course["faculty_ids"], section_id, dept)
-                        for start_slot in available_slots:
-                            attempts += 1
-                            logging.info(f"Attempt {attempts} to schedule lecture session {session+1} for {course_code} on {day} at {start_slot}")
-                            room = assign_room(enrollment, "lecture", dept, course["course_code"], day, start_slot, lecture_slots)
-                            if room:
-                                start_idx = time_slots.index(start_slot)
-                                for idx in range(start_idx, start_idx + lecture_slots):
-                                    slot = time_slots[idx]
-                                    schedule[day][slot][timetable_key] = {
-                                        "label": f"{course['course_code']} (L)\n{room}",
-                                        "course_code": course["course_code"],
-                                        "faculty_ids": course["faculty_ids"],
-                                        "section_id": section_id,
-                                        "component": "lecture"
-                                    }
-                                lecture_days.append(day)
-                                logging.info(f"Successfully scheduled lecture session {session+1} for {course_code} on {day} at {start_slot}")
-                                scheduled = True
-                                break
-                        if scheduled:
-                            break
-                    if not scheduled:
-                        logging.warning(f"Failed to schedule lecture session {session+1} for course {course_code} in {timetable_key} after {attempts} attempts")
-                
-                # Schedule tutorial
-                if tutorial_slots > 0:
-                    attempts = 0
-                    scheduled = False
-                    for day in scheduling_days:
-                        if day in lecture_days:
-                            continue
-                        available_slots = get_available_slots(day, tutorial_slots, timetable_key, course["faculty_ids"], section_id, dept)
-                        for start_slot in available_slots:
-                            attempts += 1
-                            logging.info(f"Attempt {attempts} to schedule tutorial for {course_code} on {day} at {start_slot}")
-                            room = assign_room(enrollment, "tutorial", dept, course["course_code"], day, start_slot, tutorial_slots)
-                            if room:
-                                start_idx = time_slots.index(start_slot)
-                                for idx in range(start_idx, start_idx + tutorial_slots):
-                                    slot = time_slots[idx]
-                                    schedule[day][slot][timetable_key] = {
-                                        "label": f"{course['course_code']} (T)\n{room}",
-                                        "course_code": course["course_code"],
-                                        "faculty_ids": course["faculty_ids"],
-                                        "section_id": section_id,
-                                        "component": "tutorial"
-                                    }
-                                logging.info(f"Successfully scheduled tutorial for {course_code} on {day} at {start_slot}")
-                                scheduled = True
-                                break
-                        if scheduled:
-                            break
-                    if not scheduled:
-                        logging.warning(f"Failed to schedule tutorial for course {course_code} in {timetable_key} after {attempts} attempts")
-                
-                items_processed += 1
-                progress = (items_processed / total_items) * 100
-                logging.info(f"Progress: {items_processed}/{total_items} items scheduled ({progress:.2f}%)")
-
-# Map time slots to display slots
-slot_mapping = {}
-for display_slot in display_slots:
-    start, end = display_slot.split("-")
-    start_time = datetime.strptime(start, "%H:%M").time()
-    end_time = datetime.strptime(end, "%H:%M").time()
-    slot_mapping[display_slot] = [slot for slot in time_slots if start_time <= datetime.strptime(slot, "%H:%M").time() < end_time]
-
-# Generate HTML with timetable and elective details
-logging.info("Generating HTML output")
-html_content = """
+# Bump when a change to the scheduler alters its output for the same inputs; part of the
+# schedule cache key together with the scheduler sources
+scheduler_version = 2
+
+# Shared page frame of the HTML outputs
+html_head = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -736,208 +88,1996 @@ html_content = """
     <h1 class="text-3xl font-bold mb-4 text-center">INDIAN INSTITUTE OF INFORMATION TECHNOLOGY, DHARWAD</h1>
     <h2 class="text-2xl font-semibold mb-8 text-center">Time Table for an Academic year Dec 24 – April 2025</h2>
 """
-for dept, semesters in semesters_by_dept.items():
-    for semester in semesters:
-        semester_courses = courses_df[(courses_df["department"] == dept) & (courses_df["semester"] == semester)]
-        for section_id in semester_courses["section_id"].unique():
-            timetable_key = f"{dept}_{semester}_{section_id}"
-            section = sections_df[sections_df["section_id"] == section_id].iloc[0]
-            roll_start = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}001"
-            roll_end = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}0{int(section['strength']):02d}"
-            html_content += f'<h3 class="text-xl font-semibold mb-2">Section: {section["batch_name"]} – Roll no {roll_start} to {roll_end}</h3>'
-            html_content += f'<p class="mb-4">Group mail id – {section["year"]}{section["department"].lower()}{section["batch_name"][-2:]}@iiitdwd.ac.in</p>'
-            html_content += '<table class="timetable-table">'
-            html_content += '<thead><tr><th>Day</th>'
-            for slot in display_slots:
-                html_content += f'<th>{slot}</th>'
-            html_content += '</tr></thead><tbody>'
-            
-            for day in scheduling_days:
-                html_content += f'<tr><td>{day}</td>'
-                for display_slot in display_slots:
-                    start_time = datetime.strptime(display_slot.split("-")[0], "%H:%M").time()
-                    end_time = datetime.strptime(display_slot.split("-")[1], "%H:%M").time()
-                    lunch_start = lunch_schedule[dept]["start"]
-                    lunch_end = lunch_schedule[dept]["end"]
-                    if (start_time >= morning_break_start and start_time < morning_break_end) or \
-                       (end_time > morning_break_start and end_time <= morning_break_end):
-                        html_content += '<td class="break-cell">Morning Break</td>'
-                        continue
-                    if (start_time >= lunch_start and start_time < lunch_end) or \
-                       (end_time > lunch_start and end_time <= lunch_end):
-                        dept_lunch = lunch_schedule[dept]["start"].strftime("%H:%M") + "-" + lunch_schedule[dept]["end"].strftime("%H:%M")
-                        html_content += f'<td class="break-cell">Lunch Break ({dept_lunch})</td>'
-                        continue
-                    slots = slot_mapping[display_slot]
-                    cell_content = ""
-                    cell_style = ""
-                    current_course = None
-                    for slot in slots:
-                        info = schedule[day][slot].get(timetable_key, {})
-                        if not info:
-                            continue
-                        if current_course and info["course_code"] != current_course:
-                            break
-                        current_course = info["course_code"]
-                        cell_content = info["label"]
-                        color = assign_color(info["course_code"])
-                        cell_style = f'background-color: #{color};'
-                    html_content += f'<td style="{cell_style}">{cell_content}</td>'
-                html_content += '</tr>'
-            html_content += '</tbody></table>'
-
-# Add elective details table
-html_content += '<h2 class="text-2xl font-semibold mt-8 mb-4">Elective Scheduling Details</h2>'
-html_content += '<table class="elective-table">'
-html_content += '<thead><tr><th>Basket ID</th><th>Course Name</th><th>Faculty</th><th>Room</th><th>Time Slot</th><th>LTPSC</th><th>Extra Sessions</th></tr></thead><tbody>'
-for detail in elective_details:
-    html_content += '<tr>'
-    html_content += f'<td>{detail["Basket ID"]}</td>'
-    html_content += f'<td>{detail["Course Name"]}</td>'
-    html_content += f'<td>{detail["Faculty"]}</td>'
-    html_content += f'<td>{detail["Room"]}</td>'
-    html_content += f'<td>{detail["Time Slot"]}</td>'
-    html_content += f'<td>{detail["LTPSC"]}</td>'
-    html_content += f'<td>{detail["Extra Sessions"]}</td>'
-    html_content += '</tr>'
-html_content += '</tbody></table>'
-
-html_content += """
+html_tail = """
 </body>
 </html>
 """
 
-with open(os.path.join(output_dir, "timetable.html"), "w") as f:
-    f.write(html_content)
-
-# Generate Excel
-logging.info("Generating Excel output")
-wb = Workbook()
-wb.remove(wb.active)
-
-for dept, semesters in semesters_by_dept.items():
-    for semester in semesters:
-        semester_courses = courses_df[(courses_df["department"] == dept) & (courses_df["semester"] == semester)]
-        for section_id in semester_courses["section_id"].unique():
-            timetable_key = f"{dept}_{semester}_{section_id}"
-            section = sections_df[sections_df["section_id"] == section_id].iloc[0]
-            sheet_name = f"{section['batch_name']}_{semester}".replace("/", "_")
-            ws = wb.create_sheet(title=sheet_name[:31])
-            ws.append([""] * 3)
-            ws.append(["INDIAN INSTITUTE OF INFORMATION TECHNOLOGY, DHARWAD"])
-            ws.merge_cells(start_row=4, start_column=1, end_row=4, end_column=len(display_slots) + 1)
-            ws.append(["Time Table for an Academic year Dec 24 – April 2025"])
-            ws.merge_cells(start_row=5, start_column=1, end_row=5, end_column=len(display_slots) + 1)
-            roll_start = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}001"
-            roll_end = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}0{int(section['strength']):02d}"
-            ws.append([f"Section: {section['batch_name']} – Roll no {roll_start} to {roll_end}"])
-            ws.append([f"Group mail id – {section["year"]}{section["department"].lower()}{section["batch_name"][-2:]}@iiitdwd.ac.in"])
-            ws.append(["Day"] + display_slots)
-            
-            for day in scheduling_days:
-                row = [day]
-                for display_slot in display_slots:
-                    start_time = datetime.strptime(display_slot.split("-")[0], "%H:%M").time()
-                    end_time = datetime.strptime(display_slot.split("-")[1], "%H:%M").time()
-                    lunch_start = lunch_schedule[dept]["start"]
-                    lunch_end = lunch_schedule[dept]["end"]
-                    if (start_time >= morning_break_start and start_time < morning_break_end) or \
-                       (end_time > morning_break_start and end_time <= morning_break_end):
-                        row.append("Morning Break")
-                        continue
-                    if (start_time >= lunch_start and start_time < lunch_end) or \
-                       (end_time > lunch_start and end_time <= lunch_end):
-                        dept_lunch = lunch_schedule[dept]["start"].strftime("%H:%M") + "-" + lunch_schedule[dept]["end"].strftime("%H:%M")
-                        row.append(f"Lunch Break ({dept_lunch})")
-                        continue
-                    slots = slot_mapping[display_slot]
-                    cell_content = ""
-                    current_course = None
-                    for slot in slots:
-                        info = schedule[day][slot].get(timetable_key, {})
-                        if not info:
-                            continue
-                        if current_course and info["course_code"] != current_course:
-                            break
-                        current_course = info["course_code"]
-                        cell_content = info["label"]
-                    row.append(cell_content)
-                ws.append(row)
-            
-            for row in ws.iter_rows(min_row=4, max_row=5, min_col=1, max_col=1):
-                for cell in row:
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-            for cell in ws[9]:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-                cell.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-            
-            for row in ws.iter_rows(min_row=10, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                for cell in row:
-                    cell.alignment = Alignment(wrap_text=True, vertical="top")
-                    cell.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-                    if cell.column == 1:
-                        continue
-                    if cell.value in [None, ""]:
-                        continue
-                    if "Break" in str(cell.value):
-                        cell.fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-                    else:
-                        for course_code in course_colors:
-                            if course_code in str(cell.value):
-                                color = course_colors[course_code]
-                                cell.fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-                                break
-            
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = max_length + 2
-                ws.column_dimensions[column].width = adjusted_width
-
-# Add elective details sheet
-ws = wb.create_sheet(title="Elective_Details")
-ws.append(["Basket ID", "Course Name", "Faculty", "Room", "Time Slot", "LTPSC", "Extra Sessions"])
-for detail in elective_details:
-    ws.append([
-        detail["Basket ID"],
-        detail["Course Name"],
-        detail["Faculty"],
-        detail["Room"],
-        detail["Time Slot"],
-        detail["LTPSC"],
-        detail["Extra Sessions"]
-    ])
-
-for cell in ws[1]:
-    cell.font = Font(bold=True)
-    cell.alignment = Alignment(horizontal="center", vertical="center")
-    cell.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-
-for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-    for cell in row:
-        cell.alignment = Alignment(wrap_text=True, vertical="top")
-        cell.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-
-for col in ws.columns:
-    max_length = 0
-    column = col[0].column_letter
-    for cell in col:
+def touches_break(start, end, break_start, break_end):
+    return (start >= break_start and start < break_end) or (end > break_start and end <= break_end)
+
+def slot_mask(start_idx, duration_slots):
+    return ((1 << duration_slots) - 1) << start_idx
+
+@lru_cache(maxsize=None)
+def _parse_faculty_ids(faculty_ids):
+    return tuple(int(fid) for fid in faculty_ids.split(";") if fid)
+
+def parse_faculty_ids(faculty_ids):
+    # "a;b;c" -> (a, b, c) as ints, memoized so hot loops never re-split the same string
+    if pd.isna(faculty_ids):
+        return ()
+    return _parse_faculty_ids(str(faculty_ids))
+
+def get_slot_counts(lecture_hours, tutorial_hours, practical_hours):
+    # Map LTPSC hours to (lecture_slots, lecture_sessions, tutorial_slots, practical_slots)
+    lecture_slots = 3 if lecture_hours >= 1.5 else 2
+    lecture_sessions = 2 if lecture_hours == 3 else 1
+    tutorial_slots = 2 if tutorial_hours > 0 else 0
+    practical_slots = 4 if practical_hours > 0 else 0
+    return lecture_slots, lecture_sessions, tutorial_slots, practical_slots
+
+
+class Course:
+    # One row of courses.csv, converted once at load with the faculty ids parsed and the
+    # LTPSC hours mapped to slot counts. __slots__ keeps large course lists compact.
+    __slots__ = ("course_id", "department", "semester", "course_code", "course_name",
+                 "lecture_hours", "tutorial_hours", "practical_hours", "self_study_hours", "credits",
+                 "faculty_ids", "faculty", "is_elective", "basket_id", "combined", "enrollment", "section_id",
+                 "timetable_key", "lecture_slots", "lecture_sessions", "tutorial_slots", "practical_slots")
+
+    def __init__(self, record):
+        self.course_id = int(record["course_id"])
+        self.department = record["department"]
+        self.semester = record["semester"]
+        self.course_code = record["course_code"]
+        self.course_name = record["course_name"]
+        self.lecture_hours = record["lecture_hours"]
+        self.tutorial_hours = record["tutorial_hours"]
+        self.practical_hours = record["practical_hours"]
+        self.self_study_hours = record["self_study_hours"]
+        self.credits = record["credits"]
+        self.faculty_ids = None if pd.isna(record["faculty_ids"]) else str(record["faculty_ids"])
+        self.faculty = parse_faculty_ids(self.faculty_ids)
+        self.is_elective = bool(record["is_elective"])
+        self.basket_id = None if pd.isna(record["basket_id"]) else record["basket_id"]
+        self.combined = bool(record["combined"])
+        self.enrollment = int(record["enrollment"])
+        self.section_id = int(record["section_id"])
+        self.timetable_key = f"{self.department}_{self.semester}_{self.section_id}"
+        self.lecture_slots, self.lecture_sessions, self.tutorial_slots, self.practical_slots = \
+            get_slot_counts(self.lecture_hours, self.tutorial_hours, self.practical_hours)
+
+    def ltpsc(self):
+        return f"{self.lecture_hours}-{self.tutorial_hours}-{self.practical_hours}-{self.self_study_hours}-{self.credits}"
+
+
+class Session:
+    # One lecture, tutorial or practical batch of a SchedulingUnit: the unit of placement.
+    # room_requests lists (course_code, enrollment, component_type) needing one room each.
+    __slots__ = ("unit", "component", "tag", "duration_slots", "room_requests", "description", "batch_name")
+
+    def __init__(self, unit, component, tag, duration_slots, room_requests, description, batch_name=None):
+        self.unit = unit
+        self.component = component
+        self.tag = tag
+        self.duration_slots = duration_slots
+        self.room_requests = room_requests
+        self.description = description
+        self.batch_name = batch_name
+
+    def key(self):
+        # Stable identity across runs, used by the persisted schedule state. The faculty are
+        # part of the unit signature instead, so a new teacher marks the session as changed.
+        unit = self.unit
+        return f"{unit.kind}|{unit.code}|{';'.join(unit.timetable_keys)}|{self.description}"
+
+
+class SchedulingUnit:
+    # A course, combined course or elective basket. Its sessions are booked into every
+    # timetable key of the unit at once and use the slot counts of course (the
+    # representative course for baskets). room_courses lists (course_code, enrollment,
+    # faculty_ids) for each course that needs its own room; baskets have one per course.
+    # parallel_batches is how many of its lab batches may run side by side (set by load()).
+    __slots__ = ("kind", "code", "timetable_keys", "faculty_ids", "faculty", "course", "room_courses",
+                 "target", "basket_id", "section_id", "dept", "sessions", "parallel_batches")
+
+    def __init__(self, kind, code, timetable_keys, faculty_ids, course, room_courses, target, lab_capacity, basket_id=None):
+        self.kind = kind
+        self.code = code
+        self.timetable_keys = timetable_keys
+        self.faculty_ids = faculty_ids
+        self.faculty = parse_faculty_ids(faculty_ids)
+        self.course = course
+        self.room_courses = room_courses
+        self.target = target
+        self.basket_id = basket_id
+        self.section_id = course.section_id
+        self.dept = course.department
+        self.parallel_batches = 1
+
+        # Practicals first (one session per lab batch), then lecture sessions, then the tutorial
+        self.sessions = []
+        if course.practical_slots > 0:
+            max_enrollment = max(room_course[1] for room_course in room_courses)
+            batches = max(1, int(max_enrollment / lab_capacity) + (1 if max_enrollment % lab_capacity else 0))
+            requests = [(room_course[0], min(room_course[1], lab_capacity), "practical") for room_course in room_courses]
+            for batch in range(batches):
+                batch_name = f"Batch {chr(65+batch)}"
+                self.sessions.append(Session(self, "practical", f"(LAB) ({batch_name})", course.practical_slots, requests,
+                                             f"practical ({batch_name}) for {target}", batch_name))
+        requests = [(room_course[0], room_course[1], "lecture") for room_course in room_courses]
+        for number in range(1, course.lecture_sessions + 1):
+            self.sessions.append(Session(self, "lecture", "(L)", course.lecture_slots, requests, f"lecture session {number} for {target}"))
+        if course.tutorial_slots > 0:
+            requests = [(room_course[0], room_course[1], "tutorial") for room_course in room_courses]
+            self.sessions.append(Session(self, "tutorial", "(T)", course.tutorial_slots, requests, f"tutorial for {target}"))
+
+    def signature(self):
+        # Everything a placement of this unit depends on besides its session key; a unit whose
+        # signature changed between runs is rescheduled (see TimetableGenerator.reschedule)
+        rooms = ";".join(f"{code}:{int(enrollment)}:{faculty_ids}" for code, enrollment, faculty_ids in self.room_courses)
+        return f"{self.dept}|{self.course.ltpsc()}|{rooms}"
+
+
+class TimetableGenerator:
+    # Usage: generator = TimetableGenerator(); generator.load(); generator.schedule();
+    # generator.render_html(); generator.render_excel(). load() can be reused across
+    # several schedule() calls since schedule() starts from an empty timetable.
+
+    def __init__(self, data_dir="data", output_dir="output", shared_data=None):
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        # {csv name: DataFrame} read once for a batch (load_shared_data), used for the files
+        # the data folder does not have
+        self.shared_data = shared_data or {}
+        # Wall time per pipeline phase and scheduler counters, reported by write_metrics
+        self.metrics = {"phases": {}, "counters": dict.fromkeys(metric_counters, 0)}
+        self.counters = self.metrics["counters"]
+        # Shared faculty and room calendar (use_calendar) and the other runs' masks read from it
+        self.calendar = None
+        self.calendar_busy = {"faculty": {}, "room": {}}
+        self.calendar_digest = None
+
+    def read_csv(self, name, columns=None):
+        # A CSV of the data folder, else the shared copy of a batch, else an empty table
+        # with `columns` for optional inputs (required ones raise FileNotFoundError)
+        path = os.path.join(self.data_dir, name)
+        if os.path.exists(path):
+            return pd.read_csv(path)
+        if name in self.shared_data:
+            return self.shared_data[name].copy()
+        if columns is not None:
+            return pd.DataFrame(columns=columns)
+        return pd.read_csv(path)
+
+    def load(self):
+        # Read CSV files from the data folder
+        self.courses_df = self.read_csv("courses.csv")
+        self.config_df = self.read_csv("config.csv").set_index("parameter")["value"]
+        self.rooms_df = self.read_csv("rooms.csv")
+        self.sections_df = self.read_csv("sections.csv")
+        # First row of each section_id, for the section headers of the renderers
+        self.sections_by_id = {}
+        for record in self.sections_df.to_dict("records"):
+            self.sections_by_id.setdefault(record["section_id"], record)
+        self.faculty_df = self.read_csv("faculty.csv")
+        self.faculty_names = dict(zip(self.faculty_df["faculty_id"], self.faculty_df["faculty_name"]))
+        self.assistants_df = self.read_csv("assistants.csv")
+        # Optional inputs: a missing file reads as an empty table
+        self.exams_df = self.read_csv("exams.csv", ["course_id", "duration_minutes", "requires_bench"])
+        self.reservations_df = self.read_csv("reservations.csv", ["day", "start_time", "end_time", "purpose"])
+        self.faculty_preferences_df = self.read_csv("faculty_preferences.csv", ["faculty_id", "day", "start_time", "end_time", "priority"])
+        self.elective_enrollments_df = self.read_csv("elective_enrollments.csv").dropna()
+
+        # Extract configuration parameters
+        self.slot_duration = int(self.config_df["slot_duration_minutes"])  # 30 minutes
+        self.scheduling_days = self.config_df["scheduling_days"].split(";")
+        self.ta_threshold = int(self.config_df["teaching_assistant_threshold"])
+        # Lab batches one faculty member can supervise at the same time (optional, default 1)
+        self.lab_batches_per_faculty = int(self.config_df.get("lab_batches_per_faculty", 1))
+        # Whether assistants may fill positions outside their preference windows (optional, default FALSE)
+        self.assistants_outside_window = str(self.config_df.get("assistants_outside_window", "FALSE")).strip().upper() == "TRUE"
+
+        # Define time slots (30-minute increments from 9:00 to 19:30)
+        start_time = datetime.strptime("09:00", "%H:%M")
+        end_time = datetime.strptime("19:30", "%H:%M")
+        self.time_slots = []
+        current_time = start_time
+        while current_time.time() <= end_time.time():
+            self.time_slots.append(current_time.time().strftime("%H:%M"))
+            current_time += timedelta(minutes=self.slot_duration)
+        self.slot_index = {slot: idx for idx, slot in enumerate(self.time_slots)}
+        self.slot_times = [datetime.strptime(slot, "%H:%M") for slot in self.time_slots]
+
+        # Reserved slots (REQ-12): bit i of reserved_slots[day] is set when time_slots[i] overlaps
+        # a reservation; get_allowed_starts removes the starts that would run into one
+        self.reserved_slots = {}
+        for record in self.reservations_df.to_dict("records"):
+            mask = self.window_mask(record["start_time"], record["end_time"])
+            for day in self.csv_days(record["day"]):
+                self.reserved_slots[day] = self.reserved_slots.get(day, 0) | mask
+
+        # Faculty preferences (REQ-11): preference_scores[(fid, day)][i] is the summed priority
+        # of that faculty member's preferred windows overlapping time_slots[i] (negative
+        # priorities mark times to avoid). slot_ranking turns them into start orders.
+        self.preference_scores = {}
+        for record in self.faculty_preferences_df.to_dict("records"):
+            mask = self.window_mask(record["start_time"], record["end_time"])
+            for day in self.csv_days(record["day"]):
+                scores = self.preference_scores.setdefault((int(record["faculty_id"]), day), [0] * len(self.time_slots))
+                for idx in range(len(self.time_slots)):
+                    if mask >> idx & 1:
+                        scores[idx] += float(record["priority"])
+        self.slot_rankings = {}
+
+        # Map time slots to display slots
+        self.slot_mapping = {}
+        for display_slot in display_slots:
+            start, end = display_slot.split("-")
+            start_time = datetime.strptime(start, "%H:%M").time()
+            end_time = datetime.strptime(end, "%H:%M").time()
+            self.slot_mapping[display_slot] = [slot for slot, slot_time in zip(self.time_slots, self.slot_times)
+                                               if start_time <= slot_time.time() < end_time]
+        # display_index[i]: position in display_slots of the column showing time_slots[i], or None
+        self.display_index = [None] * len(self.time_slots)
+        for position, display_slot in enumerate(display_slots):
+            for slot in self.slot_mapping[display_slot]:
+                self.display_index[self.slot_index[slot]] = position
+
+        # Precompute break handling once per department: bit i of allowed_starts[(dept, duration_slots)]
+        # is set when a session of that many slots may start at time_slots[i] (fits the day, avoids
+        # the morning and lunch breaks). display_breaks[dept] holds the break label for each display slot.
+        self.allowed_starts = {}
+        self.display_breaks = {}
+        for dept in lunch_schedule:
+            dept_lunch = lunch_schedule[dept]["start"].strftime("%H:%M") + "-" + lunch_schedule[dept]["end"].strftime("%H:%M")
+            self.display_breaks[dept] = []
+            for display_slot in display_slots:
+                start, end = (datetime.strptime(t, "%H:%M").time() for t in display_slot.split("-"))
+                if touches_break(start, end, morning_break_start, morning_break_end):
+                    self.display_breaks[dept].append("Morning Break")
+                elif touches_break(start, end, lunch_schedule[dept]["start"], lunch_schedule[dept]["end"]):
+                    self.display_breaks[dept].append(f"Lunch Break ({dept_lunch})")
+                else:
+                    self.display_breaks[dept].append(None)
+
+        courses_df = self.courses_df
+        self.courses = [Course(record) for record in courses_df.to_dict("records")]
+        self.courses_by_key = {}
+        for course in self.courses:
+            self.courses_by_key.setdefault(course.timetable_key, []).append(course)
+
+        # Get unique semesters by department and the sections of each semester in one pass
+        # over the courses (sections keep their order of first appearance in courses.csv)
+        sections_by_semester = {}
+        for course in self.courses:
+            if course.department in lunch_schedule:
+                sections = sections_by_semester.setdefault((course.department, course.semester), [])
+                if course.section_id not in sections:
+                    sections.append(course.section_id)
+        self.semesters_by_dept = {
+            dept: sorted(semester for course_dept, semester in sections_by_semester if course_dept == dept)
+            for dept in lunch_schedule
+        }
+
+        # Create a list of all timetable keys (dept_semester_section)
+        self.timetable_keys = []
+        self.timetable_sections = []
+        for dept, semesters in self.semesters_by_dept.items():
+            for semester in semesters:
+                for section_id in sections_by_semester[(dept, semester)]:
+                    key = f"{dept}_{semester}_{section_id}"
+                    self.timetable_keys.append(key)
+                    self.timetable_sections.append((key, dept, semester, section_id))
+
+        # Per-section enrollment of every course: one left join against elective_enrollments.csv,
+        # falling back to the course enrollment where a (course, section) pair has no entry
+        enrollment_keys = ["course_id", "section_id"]
+        elective_enrollments = self.elective_enrollments_df[enrollment_keys + ["enrollment"]].astype(int).drop_duplicates(enrollment_keys)
+        merged = courses_df[enrollment_keys + ["enrollment"]].merge(elective_enrollments, on=enrollment_keys, how="left", suffixes=("", "_elective"))
+        merged["enrollment_elective"] = merged["enrollment_elective"].fillna(merged["enrollment"]).astype(int)
+        self.section_enrollments = dict(zip(zip(merged["course_id"], merged["section_id"]), merged["enrollment_elective"]))
+
+        # Handle electives: group by basket
+        basket_courses = {}
+        for course in self.courses:
+            if course.is_elective and course.basket_id is not None:
+                basket_id = course.basket_id
+                key = (course.department, course.semester, basket_id)
+                if key not in basket_courses:
+                    basket_courses[key] = []
+                basket_courses[key].append(course)
+
+        # Log the detected elective baskets
+        logging.info("Detected elective baskets:")
+        for key, courses in basket_courses.items():
+            dept, semester, basket_id = key
+            course_codes = [course.course_code for course in courses]
+            logging.info(f" - {basket_id} in {dept} semester {semester}: {course_codes}")
+
+        # Process baskets (schedule only one representative course per basket)
+        self.basket_schedules = {}
+        for key, courses in basket_courses.items():
+            dept, semester, basket_id = key
+            # Use the LTPSC of the first course since all courses in the basket have the same LTPSC
+            self.basket_schedules[key] = {
+                "courses": [],
+                "representative_course": courses[0]  # Pick the first course as representative
+            }
+            for course in courses:
+                self.basket_schedules[key]["courses"].append({
+                    "course": course,
+                    "timetable_key": course.timetable_key,
+                    "enrollment": self.section_enrollments[(course.course_id, course.section_id)]
+                })
+
+        # Group combined courses
+        self.combined_courses = {}
+        for course in self.courses:
+            if course.combined:
+                course_key = (course.course_code, course.faculty_ids)
+                if course_key not in self.combined_courses:
+                    self.combined_courses[course_key] = []
+                self.combined_courses[course_key].append({
+                    "course": course,
+                    "timetable_key": course.timetable_key,
+                    "enrollment": course.enrollment
+                })
+
+        self.lab_capacity = self.rooms_df[self.rooms_df["type"].isin(["COMPUTER_LAB", "HARDWARE_LAB"])]["capacity"].min()
+
+        # Everything the scheduler places, as units in phase order (combined courses, elective
+        # baskets, then the remaining courses section by section) and their sessions
+        self.units = []
+        for (course_code, faculty_ids), instances in self.combined_courses.items():
+            course = instances[0]["course"]
+            total_enrollment = sum(instance["enrollment"] for instance in instances)
+            self.units.append(SchedulingUnit("combined", course_code, [instance["timetable_key"] for instance in instances],
+                                             faculty_ids, course, [(course_code, total_enrollment, faculty_ids)],
+                                             f"combined course {course_code}", self.lab_capacity))
+        for (dept, semester, basket_id), basket_data in self.basket_schedules.items():
+            courses = basket_data["courses"]
+            faculty_ids_set = set()
+            for course_data in courses:
+                faculty_ids_set.update(course_data["course"].faculty)
+            room_courses = [(course_data["course"].course_code, course_data["enrollment"], course_data["course"].faculty_ids) for course_data in courses]
+            self.units.append(SchedulingUnit("basket", basket_id, [course_data["timetable_key"] for course_data in courses],
+                                             ";".join(str(fid) for fid in sorted(faculty_ids_set)), basket_data["representative_course"],
+                                             room_courses, f"basket {basket_id} in {dept} semester {semester}", self.lab_capacity, basket_id=basket_id))
+        for timetable_key, dept, semester, section_id in self.timetable_sections:
+            for course in self.courses_by_key[timetable_key]:
+                # Skip combined courses and electives (baskets are scheduled as a whole)
+                if course.combined or course.is_elective:
+                    continue
+                self.units.append(SchedulingUnit("course", course.course_code, [timetable_key], course.faculty_ids, course,
+                                                 [(course.course_code, course.enrollment, course.faculty_ids)],
+                                                 f"course {course.course_code} in {timetable_key}", self.lab_capacity))
+        self.sessions = [session for unit in self.units for session in unit.sessions]
+
+        # Lab batches of a practical can run side by side in different labs when every batch
+        # has a supervisor: lab_batches_per_faculty per faculty member of the course, which is
+        # parallel_batches, plus lab assistants of the course who are free and inside their
+        # preference window at that slot (free_lab_assistants)
+        self.assistant_eligible, self.assistant_windows = assistant_allocator.eligibility(self)
+        self.lab_assistants = {course_code: [assistant_id for assistant_id, lab in by_assistant.items() if lab]
+                               for course_code, by_assistant in self.assistant_eligible.items()}
+        for unit in self.units:
+            unit.parallel_batches = max(1, min(len(parse_faculty_ids(faculty_ids)) * self.lab_batches_per_faculty
+                                               for _, _, faculty_ids in unit.room_courses))
+
+        # Bucket rooms once by type, sorted by capacity: room_pools[type] = (capacities, room_numbers).
+        # Lecture-capable types share the "LECTURE" pool. assign_room bisects to the first room
+        # that is large enough and then only tests the room_busy masks.
+        self.room_pools = {}
+        for pool, types in [("LECTURE", lecture_room_types)] + [(room_type, [room_type]) for room_type in self.rooms_df["type"].unique()]:
+            rooms = self.rooms_df[self.rooms_df["type"].isin(types)]
+            rooms = sorted(zip(rooms["capacity"], rooms["room_number"]), key=lambda room: room[0])
+            self.room_pools[pool] = ([capacity for capacity, _ in rooms], [room_number for _, room_number in rooms])
+        return self
+
+    def reset(self):
+        # Initialize 3D schedule array: timetable[day][time_slot][timetable_key]
+        self.timetable = {
+            day: {
+                slot: {key: {} for key in self.timetable_keys}
+                for slot in self.time_slots
+            }
+            for day in self.scheduling_days
+        }
+
+        # Track room usage to avoid conflicts: room_schedule[day][time_slot][room_number]
+        self.room_schedule = {
+            day: {
+                slot: {}
+                for slot in self.time_slots
+            }
+            for day in self.scheduling_days
+        }
+
+        # Occupancy index kept alongside timetable/room_schedule: one bitmask over time_slots
+        # per (entity, day), bit i set when time_slots[i] is taken. Keyed by timetable key,
+        # faculty id and room number so availability is a single mask test per entity.
+        # Faculty and rooms start out with the slots other runs booked in the calendar.
+        self.section_busy = {}
+        self.faculty_busy = dict(self.calendar_busy["faculty"])
+        self.room_busy = dict(self.calendar_busy["room"])
+
+        # Placed sessions -> (day, start_idx, rooms), and sessions that could not be placed
+        self.placements = {}
+        self.unplaced = []
+        self.repair_stats = None
+        # Assistant id -> positions, and positions nobody could fill (allocate_assistants)
+        self.assistant_assignments = {}
+        self.unfilled_positions = []
+        # Lab batches placed side by side on the strength of an assistant: session ->
+        # {course_code: assistant_id}, and the slots those assistants supervise per (assistant, day)
+        self.lab_supervisors = {}
+        self.supervisor_busy = {}
+
+        # Order in which units are scheduled within each phase and days are tried
+        # (shuffled and rotated by seeded multi-start passes)
+        self.unit_order = self.units
+        self.day_order = self.scheduling_days
+
+        # Store elective scheduling details for output
+        self.elective_details = []
+        self.course_colors = {}
+
+    @contextmanager
+    def timed(self, phase):
+        # Add the wall time of the block to metrics["phases"][phase]
+        started = time.perf_counter()
         try:
-            if len(str(cell.value)) > max_length:
-                max_length = len(str(cell.value))
-        except:
-            pass
-    adjusted_width = max_length + 2
-    ws.column_dimensions[column].width = adjusted_width
+            yield
+        finally:
+            phases = self.metrics["phases"]
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - started
+
+    def assign_color(self, identifier):
+        if identifier not in self.course_colors:
+            self.course_colors[identifier] = random.choice(color_palette)
+        return self.course_colors[identifier]
+
+    # Helper functions
+    def get_faculty_name(self, faculty_ids):
+        if pd.isna(faculty_ids):
+            return "TBD"
+        names = [self.faculty_names[fid] for fid in parse_faculty_ids(faculty_ids)]
+        return ", ".join(names)
+
+    def csv_days(self, day):
+        # Day column of reservations.csv / faculty_preferences.csv: a day name or "All"
+        day = str(day).strip()
+        if day.lower() == "all":
+            return self.scheduling_days
+        if day not in self.scheduling_days:
+            logging.warning(f"Ignoring entry for {day}, which is not a scheduling day")
+            return []
+        return [day]
+
+    def window_mask(self, start_time, end_time):
+        # Bitmask of the time slots overlapping [start_time, end_time), times as "HH:MM"
+        start = datetime.strptime(str(start_time).strip(), "%H:%M")
+        end = datetime.strptime(str(end_time).strip(), "%H:%M")
+        mask = 0
+        for idx, slot_time in enumerate(self.slot_times):
+            if slot_time < end and start < slot_time + timedelta(minutes=self.slot_duration):
+                mask |= 1 << idx
+        return mask
+
+    def get_allowed_starts(self, dept, duration_slots, day=None):
+        # With a day, starts running into a reserved slot of that day are removed as well
+        key = (dept, duration_slots)
+        reserved = self.reserved_slots.get(day, 0)
+        if reserved:
+            day_key = (dept, duration_slots, day)
+            if day_key not in self.allowed_starts:
+                blocked = sum(1 << idx for idx in range(len(self.time_slots)) if slot_mask(idx, duration_slots) & reserved)
+                self.allowed_starts[day_key] = self.get_allowed_starts(dept, duration_slots) & ~blocked
+            return self.allowed_starts[day_key]
+        if key not in self.allowed_starts:
+            lunch_start = lunch_schedule[dept]["start"]
+            lunch_end = lunch_schedule[dept]["end"]
+            mask = 0
+            for idx in range(len(self.time_slots) - duration_slots + 1):
+                start = self.slot_times[idx].time()
+                end = (self.slot_times[idx] + timedelta(minutes=self.slot_duration * duration_slots)).time()
+                if touches_break(start, end, morning_break_start, morning_break_end) or \
+                   touches_break(start, end, lunch_start, lunch_end):
+                    continue
+                mask |= 1 << idx
+            self.allowed_starts[key] = mask
+        return self.allowed_starts[key]
+
+    def book_slots(self, day, start_idx, duration_slots, timetable_keys_to_book, entry):
+        # Write the entry into the timetable and mark sections and faculty busy
+        for slot in self.time_slots[start_idx:start_idx + duration_slots]:
+            for key in timetable_keys_to_book:
+                self.timetable[day][slot][key] = dict(entry)
+        mask = slot_mask(start_idx, duration_slots)
+        for key in timetable_keys_to_book:
+            self.section_busy[(key, day)] = self.section_busy.get((key, day), 0) | mask
+        for fid in parse_faculty_ids(entry["faculty_ids"]):
+            self.faculty_busy[(fid, day)] = self.faculty_busy.get((fid, day), 0) | mask
+
+    def release_room(self, room_number, day, start_idx, duration_slots):
+        for slot in self.time_slots[start_idx:start_idx + duration_slots]:
+            if self.room_schedule[day][slot].get(room_number):
+                del self.room_schedule[day][slot][room_number]
+        self.room_busy[(room_number, day)] = self.room_busy.get((room_number, day), 0) & ~slot_mask(start_idx, duration_slots)
+
+    def room_candidates(self, course_code, enrollment, component_type):
+        # Rooms that can host the component, smallest fitting room first
+        if component_type == "practical":
+            room_type = "COMPUTER_LAB" if "CS" in course_code or "DS" in course_code else "HARDWARE_LAB"
+            required_capacity = min(enrollment, 40)
+        else:
+            room_type = "LECTURE"
+            required_capacity = enrollment
+        capacities, room_numbers = self.room_pools.get(room_type, ([], []))
+        return room_numbers[bisect_left(capacities, required_capacity):]
+
+    def reserve_room(self, room_number, day, start_idx, duration_slots):
+        for slot in self.time_slots[start_idx:start_idx + duration_slots]:
+            self.room_schedule[day][slot][room_number] = True
+        self.room_busy[(room_number, day)] = self.room_busy.get((room_number, day), 0) | slot_mask(start_idx, duration_slots)
+
+    def assign_room(self, enrollment, component_type, dept, course_code, day, start_slot, duration_slots):
+        candidates = self.room_candidates(course_code, enrollment, component_type)
+        if not candidates:
+            logging.warning(f"No rooms available for {course_code} ({component_type}) with enrollment {enrollment}")
+            return None
+
+        start_idx = self.slot_index[start_slot]
+        mask = slot_mask(start_idx, duration_slots)
+
+        for probes, room_number in enumerate(candidates, 1):
+            if not self.room_busy.get((room_number, day), 0) & mask:
+                self.counters["room_probes"] += probes
+                self.reserve_room(room_number, day, start_idx, duration_slots)
+                return room_number
+        self.counters["room_probes"] += len(candidates)
+        logging.debug(f"No available room slots for {course_code} ({component_type}) on {day} at {start_slot}")
+        return None
+
+    def is_slot_available(self, day, start_slot, duration_slots, timetable_key, faculty_ids, section_id, dept):
+        # Check for breaks and the end of the day
+        start_idx = self.slot_index[start_slot]
+        if not self.get_allowed_starts(dept, duration_slots, day) >> start_idx & 1:
+            return False
+
+        # Check for slot conflicts in the current timetable
+        mask = slot_mask(start_idx, duration_slots)
+        if self.section_busy.get((timetable_key, day), 0) & mask:
+            return False
+
+        # Check for faculty conflicts across all timetables
+        for fid in parse_faculty_ids(faculty_ids):
+            if self.faculty_busy.get((fid, day), 0) & mask:
+                logging.debug(f"Faculty conflict detected for faculty {fid} on {day} at {start_slot}")
+                return False
+        return True
+
+    def slot_ranking(self, day, duration_slots, faculty_ids):
+        # Start slots in the order they are tried: highest summed preference score of the
+        # faculty over the session window first, earliest first among equals (so time_slots
+        # order without preferences). Computed once per (faculty, day, duration).
+        key = (faculty_ids, day, duration_slots)
+        ranking = self.slot_rankings.get(key)
+        if ranking is None:
+            ranking = self.time_slots[:len(self.time_slots) - duration_slots + 1]
+            scores = [self.preference_scores[(fid, day)] for fid in parse_faculty_ids(faculty_ids) if (fid, day) in self.preference_scores]
+            if scores:
+                window = lambda idx: sum(sum(score[idx:idx + duration_slots]) for score in scores)
+                ranking = sorted(ranking, key=lambda slot: -window(self.slot_index[slot]))
+            self.slot_rankings[key] = ranking
+        return ranking
+
+    def get_available_slots(self, day, duration_slots, timetable_key, faculty_ids, section_id, dept):
+        # Candidates come out in preference order (see slot_ranking)
+        available_slots = []
+        ranking = self.slot_ranking(day, duration_slots, faculty_ids)
+        self.counters["availability_probes"] += len(ranking)
+        for start_slot in ranking:
+            if self.is_slot_available(day, start_slot, duration_slots, timetable_key, faculty_ids, section_id, dept):
+                available_slots.append(start_slot)
+        return available_slots
+
+    def find_placement(self, duration_slots, timetable_key, faculty_ids, section_id, dept, room_requests, description, skip_days=()):
+        # First-fit over days then start slots. room_requests is a list of
+        # (course_code, enrollment, component_type) needing one room each; either every
+        # request gets a room in the same slot or the partial assignment is rolled back.
+        # Returns (day, start_idx, rooms) or None. Per-attempt lines are DEBUG only and not
+        # even formatted otherwise.
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        attempts = 0
+        for day in self.day_order:
+            if day in skip_days:
+                continue
+            available_slots = self.get_available_slots(day, duration_slots, timetable_key, faculty_ids, section_id, dept)
+            for start_slot in available_slots:
+                attempts += 1
+                if debug:
+                    logging.debug(f"Attempt {attempts} to schedule {description} on {day} at {start_slot}")
+                start_idx = self.slot_index[start_slot]
+                rooms = []
+                for course_code, enrollment, component_type in room_requests:
+                    room = self.assign_room(enrollment, component_type, dept, course_code, day, start_slot, duration_slots)
+                    if not room:
+                        # Rollback room assignments if any course fails
+                        if rooms:
+                            self.counters["rollbacks"] += 1
+                        for r in rooms:
+                            self.release_room(r, day, start_idx, duration_slots)
+                        break
+                    rooms.append(room)
+                if len(rooms) == len(room_requests):
+                    self.counters["placement_attempts"] += attempts
+                    if debug:
+                        logging.debug(f"Successfully scheduled {description} on {day} at {start_slot}")
+                    return day, start_idx, rooms
+        self.counters["placement_attempts"] += attempts
+        self.counters["failures"] += 1
+        logging.warning(f"Failed to schedule {description} after {attempts} attempts")
+        return None
+
+    def blocked_days(self, session):
+        # Lectures of a unit go on different days and the tutorial avoids the lecture days
+        # (a unit has at most one tutorial, so every other lecture or tutorial blocks its day)
+        if session.component == "practical":
+            return []
+        return [self.placements[other][0] for other in session.unit.sessions
+                if other.component != "practical" and other is not session and other in self.placements]
+
+    def place_session(self, session):
+        # Greedy first-fit placement of one session; failures are collected in self.unplaced
+        unit = session.unit
+        placement = self.find_placement(session.duration_slots, unit.timetable_keys[0], unit.faculty_ids, unit.section_id, unit.dept,
+                                        session.room_requests, session.description, self.blocked_days(session))
+        if placement is None:
+            self.unplaced.append(session)
+            return False
+        day, start_idx, rooms = placement
+        self.book_session(session, day, start_idx, rooms)
+        return True
+
+    def place_lab_batches(self, batches):
+        # Lab planner for the batches of one practical: as many as have a supervisor go side
+        # by side in distinct labs of one slot, largest group first, so the section spends
+        # fewer slots in labs. Smaller groups are tried when no slot has enough free labs or
+        # assistants, and single batches are placed in sequential slots as before.
+        if not batches:
+            return
+        unit = batches[0].unit
+        most = unit.parallel_batches + min(len(self.lab_assistants.get(course_code, ())) for course_code, _, _ in unit.room_courses)
+        while batches:
+            for size in range(min(len(batches), most), 1, -1):
+                placement = self.find_parallel_placement(batches[:size])
+                if placement is None:
+                    continue
+                day, start_idx, rooms, supervisors = placement
+                width = len(batches[0].room_requests)
+                for number, session in enumerate(batches[:size]):
+                    session_rooms = rooms[number * width:(number + 1) * width]
+                    for room in session_rooms:
+                        self.reserve_room(room, day, start_idx, session.duration_slots)
+                    self.book_session(session, day, start_idx, session_rooms)
+                # The batches beyond the faculty's share are supervised by assistants
+                mask = slot_mask(start_idx, batches[0].duration_slots)
+                for session, supervisor in zip(batches[size - len(supervisors):size], supervisors):
+                    self.lab_supervisors[session] = supervisor
+                    for assistant_id in supervisor.values():
+                        self.supervisor_busy[(assistant_id, day)] = self.supervisor_busy.get((assistant_id, day), 0) | mask
+                self.counters["parallel_batches"] += size - 1
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(f"Scheduled {size} lab batches of {batches[0].unit.target} side by side on {day} at {self.time_slots[start_idx]}")
+                batches = batches[size:]
+                break
+            else:
+                self.place_session(batches[0])
+                batches = batches[1:]
+
+    def find_parallel_placement(self, batches):
+        # First (day, start_idx, rooms, supervisors) at which the section and faculty are free,
+        # every batch beyond the faculty's share has a free lab assistant (supervisors, see
+        # free_lab_assistants) and every batch gets its own rooms (room requests of all
+        # batches, in batch order), or None
+        lead = batches[0]
+        unit = lead.unit
+        extra = max(0, len(batches) - unit.parallel_batches)
+        requests = [request for session in batches for request in session.room_requests]
+        for day in self.day_order:
+            for start_slot in self.get_available_slots(day, lead.duration_slots, unit.timetable_keys[0], unit.faculty_ids, unit.section_id, unit.dept):
+                start_idx = self.slot_index[start_slot]
+                supervisors = self.free_lab_assistants(unit, day, start_idx, lead.duration_slots, extra)
+                if supervisors is None:
+                    continue
+                rooms = self.free_rooms(lead, day, start_idx, requests)
+                if rooms is not None:
+                    return day, start_idx, rooms, supervisors
+        return None
+
+    def free_lab_assistants(self, unit, day, start_idx, duration_slots, count):
+        # count lab assistants for every course of the unit who are inside their preference
+        # window (see assistant_allocator) and not supervising another lab batch at that slot,
+        # as one {course_code: assistant_id} per batch, or None when there are not enough
+        if not count:
+            return []
+        mask = slot_mask(start_idx, duration_slots)
+        supervisors = [{} for _ in range(count)]
+        taken = set()
+        for course_code, _, _ in unit.room_courses:
+            free = [assistant_id for assistant_id in self.lab_assistants.get(course_code, ())
+                    if assistant_id not in taken and not self.supervisor_busy.get((assistant_id, day), 0) & mask and
+                    (self.assistants_outside_window or assistant_allocator.in_window(self.assistant_windows, assistant_id, day, mask))]
+            if len(free) < count:
+                return None
+            for supervisor, assistant_id in zip(supervisors, free):
+                supervisor[course_code] = assistant_id
+                taken.add(assistant_id)
+        return supervisors
+
+    def book_session(self, session, day, start_idx, rooms):
+        # Book a session whose rooms are already reserved and update the elective details
+        unit = session.unit
+        if unit.basket_id is None:
+            room_text = rooms[0]
+        else:
+            room_text = "\n".join([f"{course[0]}-{room}" for course, room in zip(unit.room_courses, rooms)])
+        label = f"{unit.code} {session.tag}\n{room_text}"
+        if session.component == "practical":
+            # Lab batches placed side by side share the cell
+            current = self.timetable[day][self.time_slots[start_idx]].get(unit.timetable_keys[0])
+            if current and current["component"] == "practical" and current["course_code"] == unit.code:
+                label = f"{current['label']}\n{label}"
+        self.book_slots(day, start_idx, session.duration_slots, unit.timetable_keys, {
+            "label": label,
+            "course_code": unit.code,
+            "faculty_ids": unit.faculty_ids,
+            "section_id": unit.section_id,
+            "component": session.component
+        })
+        self.placements[session] = (day, start_idx, rooms)
+        if unit.basket_id is None:
+            return
+
+        basket_id = unit.basket_id
+        time_slot_range = f"{self.time_slots[start_idx]}-{self.time_slots[start_idx + session.duration_slots - 1]}"
+        if session.component == "practical":
+            for course, room in zip(unit.room_courses, rooms):
+                self.elective_details.append(self.elective_detail(basket_id, course, room, f"LAB ({session.batch_name}): {day} {time_slot_range}", unit.course.ltpsc()))
+        elif session.component == "lecture":
+            for course, room in zip(unit.room_courses, rooms):
+                for detail in self.elective_details:
+                    if detail["Course Name"] == course[0] and detail["Basket ID"] == basket_id:
+                        detail["Time Slot"] = f"L: {day} {time_slot_range}, " + detail["Time Slot"]
+                        break
+                else:
+                    self.elective_details.append(self.elective_detail(basket_id, course, room, f"L: {day} {time_slot_range}", unit.course.ltpsc()))
+        else:
+            for detail in self.elective_details:
+                if detail["Basket ID"] == basket_id:
+                    detail["Time Slot"] += f", T: {day} {time_slot_range}"
+
+    def elective_detail(self, basket_id, course, room, time_slot, ltpsc):
+        course_code, _, faculty_ids = course
+        return {
+            "Basket ID": basket_id,
+            "Course Name": course_code,
+            "Faculty": self.get_faculty_name(faculty_ids),
+            "Room": room,
+            "Time Slot": time_slot,
+            "LTPSC": ltpsc,
+            "Extra Sessions": ""
+        }
+
+    def schedule(self, backend="greedy", time_limit=30.0, repair_iterations=100000, repair_time_limit=1.0,
+                 starts=1, workers=None, seed=None):
+        # Greedy first-fit over the units in phase order, then a bounded repair of the
+        # sessions it left out. With starts > 1 that pass is run once per seed in a process
+        # pool and the best scoring result is kept (see schedule_multi_start). An exact
+        # backend (see exact_backends) is then warm-started from the result.
+        if starts > 1:
+            with self.timed("multi-start"):
+                self.schedule_multi_start(starts, workers, repair_iterations, repair_time_limit)
+        else:
+            self.schedule_greedy(repair_iterations, repair_time_limit, seed)
+        if backend != "greedy":
+            with self.timed(f"{backend} backend"):
+                self.schedule_exact(backend, time_limit)
+        return self
+
+    def schedule_greedy(self, repair_iterations=100000, repair_time_limit=1.0, seed=None):
+        # seed=None keeps the phase order from load(); any other seed shuffles the units
+        # within each phase and rotates the order in which days are tried
+        self.reset()
+        if seed is not None:
+            rng = random.Random(seed)
+            self.unit_order = rng.sample(self.units, len(self.units))
+            rotation = rng.randrange(len(self.scheduling_days))
+            self.day_order = self.scheduling_days[rotation:] + self.scheduling_days[:rotation]
+        # Calculate total items for progress tracking (one per basket + non-elective courses)
+        self.total_items = sum(1 for course in self.courses if not course.is_elective) + len(self.basket_schedules)
+        self.items_processed = 0
+        with self.timed("combined"):
+            self.schedule_combined_courses()
+        with self.timed("baskets"):
+            self.schedule_elective_baskets()
+        with self.timed("regular courses"):
+            self.schedule_regular_courses()
+        if repair_iterations > 0 and repair_time_limit > 0:
+            with self.timed("repair"):
+                self.repair(repair_iterations, repair_time_limit)
+        return self
+
+    def score(self):
+        # (unplaced sessions, soft penalty), lower is better. The greedy pass checks only the
+        # first section of a combined unit, so a session that double-books any of its sections
+        # counts as unplaced (lab batches of one practical sharing a slot do not). The soft
+        # penalty counts the idle slots between the first and last class of each section's
+        # day, breaks excluded.
+        unplaced = len(self.unplaced)
+        booked = {}
+        lab_slots = set()
+        for session in self.sessions:
+            if session not in self.placements:
+                continue
+            day, start_idx, _ = self.placements[session]
+            if session.component == "practical":
+                if (session.unit, day, start_idx) in lab_slots:
+                    continue
+                lab_slots.add((session.unit, day, start_idx))
+            mask = slot_mask(start_idx, session.duration_slots)
+            keys = [(key, day) for key in session.unit.timetable_keys]
+            if any(booked.get(key, 0) & mask for key in keys):
+                unplaced += 1
+            for key in keys:
+                booked[key] = booked.get(key, 0) | mask
+        dept_of = {key: dept for key, dept, _, _ in self.timetable_sections}
+        penalty = 0
+        for (key, day), mask in self.section_busy.items():
+            if not mask or key not in dept_of:
+                continue
+            span = (1 << mask.bit_length()) - (mask & -mask)
+            penalty += (span & self.get_allowed_starts(dept_of[key], 1, day) & ~mask).bit_count()
+        return unplaced, penalty
+
+    def schedule_multi_start(self, starts, workers=None, repair_iterations=100000, repair_time_limit=1.0):
+        # Run `starts` independent greedy + repair passes in a process pool: the first in
+        # phase order, the others with seeds 1..starts-1. Each worker loads the data once
+        # and sends back its score and placements by session index; ties go to the lower seed.
+        seeds = [None] + list(range(1, starts))
+        logging.info(f"Running {starts} scheduling passes on {workers or os.cpu_count()} processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_multi_start_worker,
+                                 initargs=(self.data_dir, self.output_dir, self.shared_data, self.calendar_busy)) as executor:
+            results = list(executor.map(_multi_start_pass, seeds, [repair_iterations] * starts, [repair_time_limit] * starts))
+        for seed, score, _, counters, _, _ in results:
+            logging.info(f"Pass with seed {seed}: {score[0]} sessions unplaced or double-booked, soft penalty {score[1]}")
+            # Counters report the work of all passes
+            for name, value in counters.items():
+                self.counters[name] += value
+        seed, score, placements, _, repair_stats, supervisors = min(results, key=lambda result: result[1])
+        logging.info(f"Keeping the pass with seed {seed}")
+        self.apply_placements({self.sessions[number]: placement for number, placement in placements.items()})
+        self.repair_stats = repair_stats
+        self.lab_supervisors = {self.sessions[number]: supervisor for number, supervisor in supervisors.items()}
+        return seed
+
+    def schedule_exact(self, backend, time_limit):
+        if backend not in exact_backends:
+            raise ValueError(f"Unknown scheduling backend '{backend}', expected one of: greedy, {', '.join(exact_backends)}")
+        solver = importlib.import_module(exact_backends[backend])
+        logging.info(f"Running {backend} backend with a {time_limit}s time limit ({len(self.unplaced)} sessions unplaced by greedy)")
+        placements = solver.solve(self, time_limit=time_limit)
+        # Backends are warm-started from the clash-free part of the greedy timetable, so any
+        # solution they return is at least that good; keep greedy only when they find none
+        if placements is None:
+            logging.info(f"{backend} backend found no solution, keeping the greedy timetable")
+            return False
+        greedy_placed = len(self.placements)
+        self.apply_placements(placements)
+        logging.info(f"{backend} backend placed {len(placements)} of {len(self.sessions)} sessions (greedy: {greedy_placed})")
+        return True
+
+    def apply_placements(self, placements):
+        # Rebuild the timetable from a {session: (day, start_idx, rooms)} mapping
+        self.reset()
+        for session in self.sessions:
+            if session not in placements:
+                self.unplaced.append(session)
+                continue
+            day, start_idx, rooms = placements[session]
+            for room in rooms:
+                self.reserve_room(room, day, start_idx, session.duration_slots)
+            self.book_session(session, day, start_idx, rooms)
+
+    def repair(self, max_iterations=100000, time_limit=1.0):
+        # Local search over the sessions the greedy phases could not place. A move tries an
+        # unplaced session at one allowed start: with no clash it is simply placed; when it
+        # clashes with exactly one placed session, that session is ejected, the unplaced one
+        # takes the slot and the ejected one is re-placed first-fit, undoing the move if it
+        # cannot be. Unlike the greedy pass every section of combined and basket units is
+        # checked. Rounds repeat until one places nothing or a budget runs out; only the
+        # occupancy masks change during the search and the timetable is rebuilt at the end.
+        # A failed relocate leaves the masks as they were, so until something is placed a
+        # session shaped like one that failed (another lecture or batch of the same unit) is
+        # skipped without spending moves.
+        self.start_repair_budget(max_iterations, time_limit)
+        pending = list(self.unplaced)
+        repaired = 0
+        progress = True
+        while progress and pending and not self.repair_budget_spent():
+            progress = False
+            failed = set()
+            for session in list(pending):
+                shape = (session.unit, session.component, session.duration_slots, repr(session.room_requests),
+                         tuple(sorted(self.blocked_days(session))))
+                if shape in failed:
+                    continue
+                if self.relocate(session):
+                    pending.remove(session)
+                    repaired += 1
+                    progress = True
+                    failed.clear()
+                elif self.repair_budget_spent():
+                    break
+                else:
+                    failed.add(shape)
+        elapsed = time.perf_counter() - (self.repair_deadline - time_limit)
+        repair_stats = {
+            "unplaced_before": len(self.unplaced),
+            "repaired": repaired,
+            "moves": self.repair_moves,
+            "seconds": elapsed,
+            "moves_per_second": self.repair_moves / elapsed if elapsed > 0 else 0.0,
+        }
+        logging.info(f"Repair placed {repaired} of {len(self.unplaced)} unplaced sessions: {self.repair_moves} moves in "
+                     f"{elapsed:.2f}s ({repair_stats['moves_per_second']:.0f} moves/s)")
+        if repaired:
+            supervisors = self.lab_supervisors
+            self.apply_placements(dict(self.placements))
+            self.lab_supervisors = supervisors
+        # Set after the rebuild, since apply_placements resets the stats
+        self.repair_stats = repair_stats
+        return repaired
+
+    def start_repair_budget(self, max_iterations, time_limit):
+        self.repair_moves = 0
+        self.repair_deadline = time.perf_counter() + time_limit
+        self.repair_max_moves = max_iterations
+
+    def repair_budget_spent(self):
+        return self.repair_moves >= self.repair_max_moves or time.perf_counter() >= self.repair_deadline
+
+    def relocate(self, session):
+        # One pass over the allowed starts of an unplaced session (see repair)
+        unit = session.unit
+        for day in self.day_order:
+            if day in self.blocked_days(session):
+                continue
+            allowed = self.get_allowed_starts(unit.dept, session.duration_slots, day)
+            for start_idx in range(len(self.time_slots)):
+                if not allowed >> start_idx & 1:
+                    continue
+                if self.repair_budget_spent():
+                    return False
+                self.repair_moves += 1
+                clashes = self.clashes(session, day, start_idx)
+                if clashes is None:
+                    continue
+                if not clashes:
+                    rooms = self.free_rooms(session, day, start_idx)
+                    if rooms is not None:
+                        self.occupy(session, day, start_idx, rooms)
+                        return True
+                    continue
+                # Never eject a session of the same unit, its day is part of the spread rule
+                if len(clashes) > 1 or clashes[0].unit is unit:
+                    continue
+                ejected = clashes[0]
+                previous = self.placements[ejected]
+                # A failed move is undone by restoring the saved masks rather than rebuilding them
+                saved = self.saved_masks(ejected, previous[0], previous[2])
+                self.vacate(ejected)
+                rooms = self.free_rooms(session, day, start_idx)
+                if rooms is not None:
+                    saved += self.saved_masks(session, day, rooms)
+                    self.occupy(session, day, start_idx, rooms)
+                    if self.first_fit(ejected):
+                        logging.debug(f"Repair moved {ejected.description} to place {session.description} on {day} at {self.time_slots[start_idx]}")
+                        return True
+                    del self.placements[session]
+                self.restore_masks(saved)
+                self.placements[ejected] = previous
+        return False
+
+    def first_fit(self, session):
+        # Clash-free first-fit used to re-place an ejected session; counts as repair moves
+        for day in self.day_order:
+            if day in self.blocked_days(session):
+                continue
+            allowed = self.get_allowed_starts(session.unit.dept, session.duration_slots, day)
+            for start_idx in range(len(self.time_slots)):
+                if not allowed >> start_idx & 1:
+                    continue
+                self.repair_moves += 1
+                if not self.is_free(session, day, start_idx):
+                    continue
+                rooms = self.free_rooms(session, day, start_idx)
+                if rooms is not None:
+                    self.occupy(session, day, start_idx, rooms)
+                    return True
+        return False
+
+    def is_free(self, session, day, start_idx):
+        # Whether the session's sections and faculty are free in this window (clashes() == [])
+        unit = session.unit
+        mask = slot_mask(start_idx, session.duration_slots)
+        return not any(self.section_busy.get((key, day), 0) & mask for key in unit.timetable_keys) and \
+            not any(self.faculty_busy.get((fid, day), 0) & mask for fid in unit.faculty)
+
+    def clashes(self, session, day, start_idx):
+        # Placed sessions sharing a section or a faculty member with session in this window,
+        # or None when a faculty member is booked there by another run (see use_calendar)
+        if self.is_free(session, day, start_idx):
+            return []
+        unit = session.unit
+        mask = slot_mask(start_idx, session.duration_slots)
+        calendar = self.calendar_busy["faculty"]
+        if calendar and any(calendar.get((fid, day), 0) & mask for fid in unit.faculty):
+            return None
+        end_idx = start_idx + session.duration_slots
+        keys = set(unit.timetable_keys)
+        faculty = set(unit.faculty)
+        return [other for other, (other_day, other_start, _) in self.placements.items()
+                if other_day == day and other_start < end_idx and start_idx < other_start + other.duration_slots
+                and (not keys.isdisjoint(other.unit.timetable_keys) or not faculty.isdisjoint(other.unit.faculty))]
+
+    def free_rooms(self, session, day, start_idx, requests=None):
+        # Smallest free fitting room per room request (all distinct), or None; requests
+        # defaults to the session's own
+        mask = slot_mask(start_idx, session.duration_slots)
+        rooms = []
+        for request in requests or session.room_requests:
+            for room in self.room_candidates(*request):
+                if room not in rooms and not self.room_busy.get((room, day), 0) & mask:
+                    rooms.append(room)
+                    break
+            else:
+                return None
+        return rooms
+
+    def occupy(self, session, day, start_idx, rooms):
+        # Mark a placement in the occupancy masks only (repair rebuilds the timetable later)
+        mask = slot_mask(start_idx, session.duration_slots)
+        for key in session.unit.timetable_keys:
+            self.section_busy[(key, day)] = self.section_busy.get((key, day), 0) | mask
+        for fid in session.unit.faculty:
+            self.faculty_busy[(fid, day)] = self.faculty_busy.get((fid, day), 0) | mask
+        for room in rooms:
+            self.room_busy[(room, day)] = self.room_busy.get((room, day), 0) | mask
+        self.placements[session] = (day, start_idx, rooms)
+
+    def saved_masks(self, session, day, rooms):
+        # The masks occupy or vacate change for session on day, for restore_masks
+        return [(busy, (entity, day), busy.get((entity, day)))
+                for busy, entities in ((self.section_busy, session.unit.timetable_keys), (self.faculty_busy, session.unit.faculty),
+                                       (self.room_busy, rooms))
+                for entity in entities]
+
+    def restore_masks(self, saved):
+        # Put saved masks back, latest first so the earliest saved value of an entity wins
+        for busy, key, mask in reversed(saved):
+            if mask is None:
+                busy.pop(key, None)
+            else:
+                busy[key] = mask
+
+    def vacate(self, session):
+        # Undo occupy. Greedy placements of combined units may overlap on their other
+        # sections, so the touched masks are rebuilt from the remaining placements that day
+        # and the calendar.
+        day, _, rooms = self.placements.pop(session)
+        keys = set(session.unit.timetable_keys)
+        faculty = set(session.unit.faculty)
+        room_set = set(rooms)
+        masks = {}
+        for other, (other_day, other_start, other_rooms) in self.placements.items():
+            if other_day != day:
+                continue
+            mask = slot_mask(other_start, other.duration_slots)
+            entities = [(self.section_busy, key) for key in keys.intersection(other.unit.timetable_keys)]
+            entities += [(self.faculty_busy, fid) for fid in faculty.intersection(other.unit.faculty)]
+            entities += [(self.room_busy, room) for room in room_set.intersection(other_rooms)]
+            for busy, entity in entities:
+                masks[(id(busy), entity)] = masks.get((id(busy), entity), 0) | mask
+        for busy, entities, calendar in ((self.section_busy, keys, {}), (self.faculty_busy, faculty, self.calendar_busy["faculty"]),
+                                         (self.room_busy, room_set, self.calendar_busy["room"])):
+            for entity in entities:
+                busy[(entity, day)] = masks.get((id(busy), entity), 0) | calendar.get((entity, day), 0)
+
+    def state_path(self, path=None):
+        return path or os.path.join(self.output_dir, "schedule_state.json")
+
+    def write_metrics(self, path=None):
+        # JSON report of the phase wall times and counters collected so far, with the
+        # placement totals and the repair statistics of the last schedule
+        path = path or os.path.join(self.output_dir, "metrics.json")
+        phases = self.metrics["phases"]
+        report = {
+            "version": 1,
+            "phases": {phase: round(seconds, 6) for phase, seconds in phases.items()},
+            "total_seconds": round(sum(phases.values()), 6),
+            "counters": self.counters,
+            "sessions": len(self.sessions),
+            "placed": len(self.placements),
+            "unplaced": len(self.unplaced),
+            "repair": self.repair_stats,
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+        logging.info(f"Wrote run metrics to {path} ({report['total_seconds']:.2f}s in {len(phases)} phases)")
+        return report
+
+    def save_state(self, path=None):
+        # Persist every session's placement (or None) with its unit signature, so a later
+        # run can reschedule incrementally against it, and the lab assistants reserved for
+        # batches placed side by side (lab_supervisors)
+        path = self.state_path(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        sessions = {}
+        for session in self.sessions:
+            placement = self.placements.get(session)
+            sessions[session.key()] = {
+                "unit": session.unit.signature(),
+                "placement": None if placement is None else [placement[0], self.time_slots[placement[1]], list(placement[2])],
+            }
+            if session in self.lab_supervisors:
+                sessions[session.key()]["supervisors"] = self.lab_supervisors[session]
+        with open(path, "w") as f:
+            json.dump({"version": 2, "sessions": sessions}, f, indent=1)
+        logging.info(f"Saved schedule state for {len(sessions)} sessions to {path}")
+        return path
+
+    def save_snapshot(self, path=None):
+        # Binary snapshot of timetable and room_schedule (see schedule_snapshot.py)
+        path = path or os.path.join(self.output_dir, "timetable.snapshot")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        rooms = list(dict.fromkeys([str(room) for room in self.rooms_df["room_number"]] +
+                                   [str(room) for slots in self.room_schedule.values() for booked in slots.values() for room in booked]))
+        write_snapshot(path, self.scheduling_days, self.time_slots, self.timetable_keys, rooms, self.timetable, self.room_schedule,
+                       {"elective_details": self.elective_details, "course_colors": self.course_colors})
+        logging.info(f"Saved timetable snapshot to {path}")
+        return path
+
+    def load_snapshot(self, path=None):
+        # Restore timetable, room_schedule and the elective details from a snapshot instead
+        # of scheduling, e.g. to re-render. load() must have been called with the same config.
+        path = path or os.path.join(self.output_dir, "timetable.snapshot")
+        self.reset()
+        with Snapshot(path) as snapshot:
+            if (snapshot.days, snapshot.time_slots, snapshot.timetable_keys) != (self.scheduling_days, self.time_slots, self.timetable_keys):
+                raise ValueError(f"{path} was written for different scheduling days, time slots or sections")
+            self.timetable = snapshot.timetable()
+            self.room_schedule = snapshot.room_schedule()
+            self.elective_details = snapshot.meta.get("elective_details", [])
+            self.course_colors = snapshot.meta.get("course_colors", {})
+        logging.info(f"Loaded timetable snapshot from {path}")
+        return self
+
+    def read_state(self, path=None):
+        # Saved sessions of a state file: session key -> {"unit": signature, "placement": ...}
+        path = self.state_path(path)
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") not in (1, 2):
+            raise ValueError(f"Unsupported schedule state version {state.get('version')} in {path}")
+        if state["version"] == 1:
+            # Version 1 keys also held the unit's faculty ids: kind|code|faculty|keys|description
+            sessions = {}
+            for key, saved in state["sessions"].items():
+                kind, code, _, rest = key.split("|", 3)
+                sessions[f"{kind}|{code}|{rest}"] = saved
+            return sessions
+        return state["sessions"]
+
+    def restore_placements(self, path=None):
+        # Set placements and unplaced from a state file saved for the same inputs, without
+        # touching the timetable (used with load_snapshot when the schedule is cached)
+        previous = self.read_state(path)
+        self.placements = {}
+        self.unplaced = []
+        self.lab_supervisors = {}
+        for session in self.sessions:
+            saved = previous.get(session.key())
+            if saved is None or saved["placement"] is None:
+                self.unplaced.append(session)
+                continue
+            day, start_slot, rooms = saved["placement"]
+            self.placements[session] = (day, self.slot_index[start_slot], rooms)
+            if "supervisors" in saved:
+                self.lab_supervisors[session] = saved["supervisors"]
+        return self
+
+    def reschedule(self, path=None, max_iterations=100000, time_limit=1.0):
+        # Incremental mode (REQ-01): start from a saved state instead of an empty timetable.
+        # Sessions whose unit signature is unchanged keep their placement, or stay unplaced.
+        # Only new and changed sessions are placed: at their old slot if it is still free,
+        # else first-fit, else by ejecting one clashing session as the repair phase does.
+        # Returns the diff against the saved state; load() must have been called.
+        started = time.perf_counter()
+        path = self.state_path(path)
+        previous = self.read_state(path)
+        self.reset()
+        self.start_repair_budget(max_iterations, time_limit)
+
+        pending = []
+        previous_placements = {}
+        for session in self.sessions:
+            saved = previous.get(session.key())
+            placement = None
+            if saved is not None and saved["placement"] is not None:
+                day, start_slot, rooms = saved["placement"]
+                if day in self.scheduling_days and start_slot in self.slot_index:
+                    placement = (day, self.slot_index[start_slot], rooms)
+                    previous_placements[session] = placement
+            # Sessions that now overlap another run's calendar bookings are placed again too
+            if saved is None or saved["unit"] != session.unit.signature() or \
+               placement is not None and self.calendar_clash(session, *placement):
+                pending.append(session)
+            elif placement is not None:
+                self.occupy(session, *placement)
+
+        placed, unplaced = [], []
+        for session in pending:
+            placement = previous_placements.get(session)
+            if placement is not None and placement[0] not in self.blocked_days(session) and \
+               self.get_allowed_starts(session.unit.dept, session.duration_slots, placement[0]) >> placement[1] & 1 and \
+               self.is_free(session, placement[0], placement[1]):
+                rooms = self.free_rooms(session, placement[0], placement[1])
+                if rooms is not None:
+                    self.occupy(session, placement[0], placement[1], rooms)
+                    continue
+            if self.first_fit(session) or self.relocate(session):
+                placed.append(session)
+            else:
+                unplaced.append(session)
+
+        # placed: new or changed sessions given a new slot; moved: unchanged sessions ejected
+        # to make room for them
+        current = {session.key() for session in self.sessions}
+        changed = set(pending)
+        diff = {
+            "placed": [session.description for session in placed],
+            "moved": [session.description for session, placement in previous_placements.items()
+                      if session not in changed and self.placements[session][:2] != placement[:2]],
+            "removed": [key.rsplit("|", 1)[1] for key in previous if key not in current],
+            "unplaced": [session.description for session in unplaced],
+            "unchanged": sum(1 for session, placement in previous_placements.items() if self.placements.get(session) == placement),
+        }
+        self.apply_placements(dict(self.placements))
+        # Batches still in the slot they were saved in keep the assistants reserved for them
+        self.lab_supervisors = {session: previous[session.key()]["supervisors"] for session in self.sessions
+                                if session in previous_placements and self.placements.get(session) == previous_placements[session]
+                                and "supervisors" in previous[session.key()]}
+        diff["seconds"] = time.perf_counter() - started
+        logging.info(f"Rescheduled against {path} in {diff['seconds']:.3f}s: {len(pending)} new or changed sessions, "
+                     f"{len(diff['placed'])} placed in a new slot, {len(diff['moved'])} moved, {len(diff['removed'])} removed, "
+                     f"{len(diff['unplaced'])} unplaced, {diff['unchanged']} unchanged")
+        for change in ("placed", "moved", "removed", "unplaced"):
+            for description in diff[change]:
+                logging.info(f"  {change}: {description}")
+        return diff
+
+    def log_progress(self):
+        self.items_processed += 1
+        progress = (self.items_processed / self.total_items) * 100
+        logging.debug(f"Progress: {self.items_processed}/{self.total_items} items scheduled ({progress:.2f}%)")
+
+    def schedule_units(self, kind):
+        for unit in self.unit_order:
+            if unit.kind != kind:
+                continue
+            logging.debug(f"Scheduling {unit.target} for {len(unit.timetable_keys)} sections")
+            # Practicals first, then lecture sessions, then the tutorial
+            batches = [session for session in unit.sessions if session.component == "practical"]
+            self.place_lab_batches(batches)
+            for session in unit.sessions[len(batches):]:
+                self.place_session(session)
+            self.log_progress()
+
+    def schedule_combined_courses(self):
+        # Schedule combined courses first
+        logging.info("Starting to schedule combined courses")
+        self.schedule_units("combined")
+
+    def schedule_elective_baskets(self):
+        # Schedule elective baskets (schedule only one representative course per basket)
+        logging.info("Starting to schedule elective baskets")
+        self.schedule_units("basket")
+
+    def schedule_regular_courses(self):
+        # Schedule non-elective, non-combined courses
+        logging.info("Starting to schedule non-elective, non-combined courses")
+        self.schedule_units("course")
+
+    def section_header(self, dept, section_id):
+        section = self.sections_by_id[section_id]
+        roll_start = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}001"
+        roll_end = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}0{int(section['strength']):02d}"
+        group_mail = f"{section['year']}{section['department'].lower()}{section['batch_name'][-2:]}@iiitdwd.ac.in"
+        return section, f"Section: {section['batch_name']} – Roll no {roll_start} to {roll_end}", f"Group mail id – {group_mail}"
+
+    def section_cells(self, day, dept, timetable_key):
+        # Yield (content, course_code, is_break) for each display slot of one day
+        for display_slot, break_label in zip(display_slots, self.display_breaks[dept]):
+            if break_label:
+                yield break_label, None, True
+                continue
+            cell_content = ""
+            current_course = None
+            for slot in self.slot_mapping[display_slot]:
+                info = self.timetable[day][slot].get(timetable_key, {})
+                if not info:
+                    continue
+                if current_course and info["course_code"] != current_course:
+                    break
+                current_course = info["course_code"]
+                cell_content = info["label"]
+            yield cell_content, current_course, False
+
+    def assign_section_colors(self):
+        # Give every course shown in a section table its colour up front, in the order the
+        # tables show them, so the HTML and Excel colours agree whichever is rendered first
+        for timetable_key, _, _, _ in self.timetable_sections:
+            for day in self.scheduling_days:
+                for idx, slot in enumerate(self.time_slots):
+                    info = self.timetable[day][slot].get(timetable_key)
+                    if info and self.display_index[idx] is not None:
+                        self.assign_color(info["course_code"])
+
+    def section_html(self, timetable_key, dept, semester, section_id):
+        # HTML table of one section. Colours must already be assigned (assign_section_colors).
+        _, title, group_mail = self.section_header(dept, section_id)
+        parts = [f'<h3 class="text-xl font-semibold mb-2">{title}</h3>', f'<p class="mb-4">{group_mail}</p>',
+                 '<table class="timetable-table"><thead><tr><th>Day</th>', "".join(f'<th>{slot}</th>' for slot in display_slots),
+                 '</tr></thead><tbody>']
+        for day in self.scheduling_days:
+            parts.append(f'<tr><td>{day}</td>')
+            for cell_content, course_code, is_break in self.section_cells(day, dept, timetable_key):
+                if is_break:
+                    parts.append(f'<td class="break-cell">{cell_content}</td>')
+                    continue
+                cell_style = f'background-color: #{self.course_colors[course_code]};' if course_code else ""
+                parts.append(f'<td style="{cell_style}">{cell_content}</td>')
+            parts.append('</tr>')
+        parts.append('</tbody></table>')
+        return "".join(parts)
+
+    def section_sheet(self, timetable_key, dept, semester, section_id):
+        # Sheet name, rows and fills by (row, column) of one section's worksheet. Colours
+        # must already be assigned (assign_section_colors).
+        section, title, group_mail = self.section_header(dept, section_id)
+        sheet_name = f"{section['batch_name']}_{semester}".replace("/", "_")
+        rows = [[""] * 3, ["INDIAN INSTITUTE OF INFORMATION TECHNOLOGY, DHARWAD"], [], [None],
+                ["Time Table for an Academic year Dec 24 – April 2025"], [title], [group_mail], ["Day"] + display_slots]
+        fills = {}
+        for day in self.scheduling_days:
+            row = [day]
+            for cell_content, course_code, is_break in self.section_cells(day, dept, timetable_key):
+                row.append(cell_content)
+                # Fill straight from the entry's course code
+                color = "D3D3D3" if is_break else self.course_colors.get(course_code)
+                if cell_content and color:
+                    fills[(len(rows) + 1, len(row))] = color
+            rows.append(row)
+        return sheet_name, rows, fills
+
+    def render_html(self, path=None):
+        # Generate HTML with timetable and elective details, streamed to the file
+        logging.info("Generating HTML output")
+        path = path or os.path.join(self.output_dir, "timetable.html")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            self.write_html(f)
+        return path
+
+    def write_html(self, f):
+        # Write the page to any text file handle, one section table at a time
+        f.write(html_head)
+        self.assign_section_colors()
+        for section in self.timetable_sections:
+            f.write(self.section_html(*section))
+
+        # Add elective details table
+        f.write('<h2 class="text-2xl font-semibold mt-8 mb-4">Elective Scheduling Details</h2>')
+        f.write('<table class="elective-table">')
+        f.write('<thead><tr><th>Basket ID</th><th>Course Name</th><th>Faculty</th><th>Room</th><th>Time Slot</th><th>LTPSC</th><th>Extra Sessions</th></tr></thead><tbody>')
+        columns = ["Basket ID", "Course Name", "Faculty", "Room", "Time Slot", "LTPSC", "Extra Sessions"]
+        f.writelines('<tr>' + "".join(f'<td>{detail[column]}</td>' for column in columns) + '</tr>' for detail in self.elective_details)
+        f.write('</tbody></table>')
+
+        f.write(html_tail)
+
+    def excel_styles(self, wb):
+        # Named styles registered once per workbook; cells refer to them by name instead of
+        # carrying their own Alignment/Border/PatternFill objects
+        thin = Side(style="thin")
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell_alignment = Alignment(wrap_text=True, vertical="top")
+        wb.add_named_style(NamedStyle("timetable_title", alignment=Alignment(horizontal="center", vertical="center")))
+        wb.add_named_style(NamedStyle("timetable_header", font=Font(bold=True), border=border,
+                                      alignment=Alignment(horizontal="center", vertical="center")))
+        wb.add_named_style(NamedStyle("timetable_cell", alignment=cell_alignment, border=border))
+        # One filled variant per colour: grey for breaks, then the course colours
+        for color in dict.fromkeys(["D3D3D3"] + color_palette + list(self.course_colors.values())):
+            wb.add_named_style(NamedStyle(f"timetable_cell_{color}", alignment=cell_alignment, border=border,
+                                          fill=PatternFill(start_color=color, end_color=color, fill_type="solid")))
+
+    def write_excel_sheet(self, ws, rows, row_styles, body_start, fills=None):
+        # Stream rows into a write-only sheet. Column widths (longest value + 2, at least
+        # 6) have to be set before the first row, so they come from the row values here.
+        # row_styles maps row numbers to a named style for all their cells; rows from
+        # body_start on use timetable_cell, or its fill variant from fills[(row, col)].
+        columns = max(len(row) for row in rows)
+        for col in range(columns):
+            width = max([4] + [len(str(row[col])) for row in rows if col < len(row)]) + 2
+            ws.column_dimensions[get_column_letter(col + 1)].width = width
+        for row_number, row in enumerate(rows, 1):
+            style = row_styles.get(row_number) or (row_number >= body_start and "timetable_cell")
+            if not style:
+                ws.append(row)
+                continue
+            cells = []
+            for col, value in enumerate(row, 1):
+                cell = WriteOnlyCell(ws, value=value)
+                color = fills.get((row_number, col)) if fills and style == "timetable_cell" else None
+                cell.style = f"timetable_cell_{color}" if color else style
+                cells.append(cell)
+            ws.append(cells)
+
+    def render_excel(self, path=None):
+        # Generate Excel in openpyxl's write-only mode: every sheet is streamed row by row.
+        # Row layout and styled rows are those of the in-memory export this replaces, where
+        # merging rows 4 and 5 pushed the following rows down: merged title rows 4-5, the
+        # first day bold in row 9, bordered rows from 10.
+        logging.info("Generating Excel output")
+        wb = Workbook(write_only=True)
+        self.excel_styles(wb)
+        last_column = get_column_letter(len(display_slots) + 1)
+
+        self.assign_section_colors()
+        for section in self.timetable_sections:
+            sheet_name, rows, fills = self.section_sheet(*section)
+            ws = wb.create_sheet(title=sheet_name[:31])
+            ws.merged_cells.add(f"A4:{last_column}4")
+            ws.merged_cells.add(f"A5:{last_column}5")
+            self.write_excel_sheet(ws, rows, {4: "timetable_title", 5: "timetable_title", 9: "timetable_header"}, 10, fills)
+
+        # Add elective details sheet
+        ws = wb.create_sheet(title="Elective_Details")
+        columns = ["Basket ID", "Course Name", "Faculty", "Room", "Time Slot", "LTPSC", "Extra Sessions"]
+        rows = [columns] + [[detail[column] for column in columns] for detail in self.elective_details]
+        self.write_excel_sheet(ws, rows, {1: "timetable_header"}, 2)
+
+        path = path or os.path.join(self.output_dir, "timetable.xlsx")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        wb.save(path)
+        return path
+
+    def build_view_index(self):
+        # Inverted index of the placed sessions, built in one pass: faculty id, room number
+        # and department -> [(session, day, start_idx, course_code, room)], in session order.
+        # Each course of a unit is listed under its own faculty and room, so basket courses
+        # show up in the timetable of the member who teaches them; a department lists the
+        # unit once with all its rooms.
+        dept_of = {key: dept for key, dept, _, _ in self.timetable_sections}
+        index = {"faculty": {}, "room": {}, "department": {}}
+        for session in self.sessions:
+            if session not in self.placements:
+                continue
+            day, start_idx, rooms = self.placements[session]
+            unit = session.unit
+            for (course_code, _, faculty_ids), room in zip(unit.room_courses, rooms):
+                entry = (session, day, start_idx, course_code, room)
+                for fid in parse_faculty_ids(faculty_ids):
+                    index["faculty"].setdefault(fid, []).append(entry)
+                index["room"].setdefault(room, []).append(entry)
+            # Room numbers may be read as ints from rooms.csv
+            for dept in dict.fromkeys(dept_of[key] for key in unit.timetable_keys if key in dept_of):
+                index["department"].setdefault(dept, []).append((session, day, start_idx, unit.code, ", ".join(map(str, rooms))))
+        self.view_index = index
+        return index
+
+    def view_grid(self, entries, describe):
+        # {(day, display position): (text, course_code)} for one entity, from its index entries
+        grid = {}
+        for session, day, start_idx, course_code, room in entries:
+            text = describe(session, course_code, room)
+            for idx in range(start_idx, start_idx + session.duration_slots):
+                position = self.display_index[idx]
+                if position is None:
+                    continue
+                current = grid.get((day, position))
+                if current is None:
+                    grid[(day, position)] = (text, course_code)
+                elif text not in current[0].split("\n\n"):
+                    # Two sessions in one column (e.g. a 30-minute overlap): list both
+                    grid[(day, position)] = (f"{current[0]}\n\n{text}", current[1])
+        return grid
+
+    def view_tables(self):
+        # (file stem, page heading, [(sheet name, table heading, grid)]) for each view
+        index = self.build_view_index()
+        sections = lambda session: ", ".join(dict.fromkeys(session.unit.timetable_keys))
+        faculty_text = lambda session, course_code, room: f"{course_code} {session.tag}\n{room}\n{sections(session)}"
+        room_text = lambda session, course_code, room: f"{course_code} {session.tag}\n{self.get_faculty_name(self.course_faculty(session, course_code))}\n{sections(session)}"
+        faculty_tables = [(f"{fid}_{self.faculty_names.get(fid, fid)}", f"Faculty: {self.faculty_names.get(fid, fid)}",
+                           self.view_grid(index["faculty"][fid], faculty_text)) for fid in sorted(index["faculty"])]
+        rooms = [str(room) for room in self.rooms_df["room_number"]]
+        room_tables = [(f"Room_{room}", f"Room: {room}", self.view_grid(index["room"][room], room_text))
+                       for room in dict.fromkeys(rooms + list(index["room"])) if room in index["room"]]
+        department_tables = [(f"Dept_{dept}", f"Department: {dept}", self.view_grid(index["department"][dept], faculty_text))
+                             for dept in dict.fromkeys(dept for _, dept, _, _ in self.timetable_sections) if dept in index["department"]]
+        views = [("faculty_timetable", "Faculty Timetables", faculty_tables), ("room_timetable", "Room Timetables", room_tables),
+                 ("department_timetable", "Department Timetables", department_tables)]
+        if self.assistant_assignments:
+            assignments = self.assistant_assignments
+            assistant_names = dict(zip(self.assistants_df["assistant_id"].astype(int), self.assistants_df["assistant_name"]))
+            assistant_tables = [(f"{aid}_{assistant_names.get(aid, aid)}", f"Assistant: {assistant_names.get(aid, aid)}",
+                                 self.view_grid([(item.session, item.day, item.start_idx, item.course_code, item.room) for item in assignments[aid]], faculty_text))
+                                for aid in sorted(assignments)]
+            views.append(("assistant_timetable", "Assistant Timetables", assistant_tables))
+        return views
+
+    def course_faculty(self, session, course_code):
+        for code, _, faculty_ids in session.unit.room_courses:
+            if code == course_code:
+                return faculty_ids
+        return session.unit.faculty_ids
+
+    def render_views(self):
+        # Per-faculty, per-room and per-department timetables (REQ-14), and per-assistant ones once assistants
+        # are allocated, as output/<view>.html and .xlsx, drawn from build_view_index so the
+        # cost is linear in the number of placed sessions
+        logging.info("Generating faculty, room and department views")
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        for stem, heading, tables in self.view_tables():
+            path = os.path.join(self.output_dir, f"{stem}.html")
+            with open(path, "w") as f:
+                f.write(html_head)
+                f.write(f'<h2 class="text-2xl font-semibold mb-4">{heading}</h2>')
+                table_head = '<table class="timetable-table"><thead><tr><th>Day</th>' + "".join(f'<th>{slot}</th>' for slot in display_slots) + '</tr></thead><tbody>'
+                for _, title, grid in tables:
+                    parts = [f'<h3 class="text-xl font-semibold mb-2">{title}</h3>', table_head]
+                    for day in self.scheduling_days:
+                        parts.append(f'<tr><td>{day}</td>')
+                        for position in range(len(display_slots)):
+                            text, course_code = grid.get((day, position), ("", None))
+                            cell_style = f'background-color: #{self.assign_color(course_code)};' if course_code else ""
+                            parts.append(f'<td style="{cell_style}">{text}</td>')
+                        parts.append('</tr>')
+                    parts.append('</tbody></table>')
+                    f.write("".join(parts))
+                f.write(html_tail)
+            paths.append(path)
+
+            wb = Workbook(write_only=True)
+            self.excel_styles(wb)
+            used_names = set()
+            for sheet_name, title, grid in tables:
+                # Sheet names: at most 31 characters, none of []:*?/\ and unique
+                name = "".join("_" if char in "[]:*?/\\" else char for char in sheet_name)[:31]
+                while name.lower() in used_names:
+                    name = f"{name[:27]}_{len(used_names)}"
+                used_names.add(name.lower())
+                ws = wb.create_sheet(title=name)
+                rows = [[title], ["Day"] + display_slots]
+                fills = {}
+                for day in self.scheduling_days:
+                    row = [day]
+                    for position in range(len(display_slots)):
+                        text, course_code = grid.get((day, position), ("", None))
+                        row.append(text)
+                        if course_code:
+                            fills[(len(rows) + 1, len(row))] = self.assign_color(course_code)
+                    rows.append(row)
+                self.write_excel_sheet(ws, rows, {1: "timetable_title", 2: "timetable_header"}, 3, fills)
+            path = os.path.join(self.output_dir, f"{stem}.xlsx")
+            wb.save(path)
+            paths.append(path)
+        return paths
+
+    def allocate_assistants(self):
+        # Teaching and lab assistants for the placed sessions (REQ-17): assistant_assignments
+        # maps assistant ids to their positions, unfilled_positions lists the rest. See
+        # assistant_allocator for the matching.
+        self.assistant_assignments, self.unfilled_positions = assistant_allocator.allocate(self)
+        return self
+
+    def schedule_exams(self):
+        # Exam timetable and seating plans (REQ-15), independent of the class timetable;
+        # load() must have been called. See exam_scheduler for the model.
+        self.exam_plan = exam_scheduler.schedule_exams(self)
+        return self
+
+    def render_exams(self):
+        # output/exam_timetable.html and .xlsx: the exam sessions, then one seating plan
+        # per room listing its seat ranges by exam and section
+        logging.info("Generating exam timetable")
+        os.makedirs(self.output_dir, exist_ok=True)
+        batch = lambda section_id: self.sections_by_id[section_id]["batch_name"] if section_id in self.sections_by_id else str(section_id)
+        schedule_rows = [["Day", "Time", "Exam", "Duration (min)", "Students", "Sections"]]
+        room_rows = {}
+        for session in self.exam_plan["sessions"]:
+            for exam in session["exams"]:
+                schedule_rows.append([f"Day {session['day']}", session["time"], exam.code, exam.duration_minutes, exam.students,
+                                      ", ".join(batch(section_id) for section_id in exam.cohorts)])
+            for room, code, section_id, first, last in session["seating"]:
+                room_rows.setdefault(room, []).append([f"Day {session['day']}", session["time"], code, batch(section_id), f"{first}-{last}", last - first + 1])
+        room_header = ["Day", "Time", "Exam", "Section", "Seats", "Students"]
+        rooms = [room for room in map(str, self.rooms_df["room_number"]) if room in room_rows]
+        tables = [("Exam Schedule", f"Exam Schedule ({self.exam_plan['days']} days)", schedule_rows)] + \
+                 [(f"Room_{room}", f"Seating: Room {room}", [room_header] + room_rows[room]) for room in rooms]
+
+        path = os.path.join(self.output_dir, "exam_timetable.html")
+        with open(path, "w") as f:
+            f.write(html_head)
+            for _, title, rows in tables:
+                parts = [f'<h3 class="text-xl font-semibold mb-2">{title}</h3>', '<table class="timetable-table"><thead><tr>']
+                parts.extend(f'<th>{value}</th>' for value in rows[0])
+                parts.append('</tr></thead><tbody>')
+                for row in rows[1:]:
+                    parts.append('<tr>' + "".join(f'<td>{value}</td>' for value in row) + '</tr>')
+                parts.append('</tbody></table>')
+                f.write("".join(parts))
+            f.write(html_tail)
+        paths = [path]
+
+        wb = Workbook(write_only=True)
+        self.excel_styles(wb)
+        for sheet_name, title, rows in tables:
+            ws = wb.create_sheet(title=sheet_name[:31])
+            self.write_excel_sheet(ws, [[title]] + rows, {1: "timetable_title", 2: "timetable_header"}, 3)
+        path = os.path.join(self.output_dir, "exam_timetable.xlsx")
+        wb.save(path)
+        paths.append(path)
+        return paths
+
+    def cache_key(self, *options):
+        # Hash of every CSV in the data folder (and of the shared tables it falls back to), the
+        # scheduler version and sources, and the scheduling options that change the result
+        digest = hashlib.sha256(f"{scheduler_version}|{options!r}".encode())
+        sources = [__file__] + [os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+                                for name in ("cpsat_backend.py", "assistant_allocator.py")]
+        for path in sources + sorted(os.path.join(self.data_dir, name) for name in os.listdir(self.data_dir) if name.endswith(".csv")):
+            if os.path.exists(path):
+                digest.update(os.path.basename(path).encode())
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+        for name in sorted(self.shared_data):
+            if not os.path.exists(os.path.join(self.data_dir, name)):
+                digest.update(f"shared {name}".encode())
+                digest.update(hashlib.sha256(self.shared_data[name].to_csv(index=False).encode()).digest())
+        return digest.hexdigest()
+
+    def use_calendar(self, path, owner=None):
+        # Book faculty and rooms against the shared calendar at path (see occupancy_store),
+        # as owner (default: the data folder). Call after load().
+        self.calendar = OccupancyStore(path, owner or os.path.abspath(self.data_dir), self.time_slots)
+        self.refresh_calendar()
+        return self
+
+    def refresh_calendar(self):
+        # Read the other runs' faculty and room masks; the next reset() starts from them
+        self.calendar_busy, self.calendar_digest = self.calendar.snapshot()
+        logging.info(f"Calendar {self.calendar.path}: {len(self.calendar_busy['faculty'])} faculty days and "
+                     f"{len(self.calendar_busy['room'])} room days booked by other runs")
+
+    def calendar_clash(self, session, day, start_idx, rooms):
+        # Whether a placement overlaps a faculty or room booking of another run
+        mask = slot_mask(start_idx, session.duration_slots)
+        return any(self.calendar_busy[kind].get((entity, day), 0) & mask
+                   for kind, entities in (("faculty", session.unit.faculty), ("room", rooms)) for entity in entities)
+
+    def calendar_masks(self):
+        # {kind: {(entity, day): mask}} of this run's placed sessions, for the calendar
+        masks = {"faculty": {}, "room": {}}
+        for session, (day, start_idx, rooms) in self.placements.items():
+            mask = slot_mask(start_idx, session.duration_slots)
+            for kind, entities in (("faculty", session.unit.faculty), ("room", rooms)):
+                for entity in entities:
+                    masks[kind][(entity, day)] = masks[kind].get((entity, day), 0) | mask
+        return masks
+
+    def reserve_calendar(self):
+        # Write this run's bookings to the calendar; returns the slots another run booked
+        # since refresh_calendar, in which case nothing was written
+        conflicts = self.calendar.reserve(self.calendar_masks())
+        self.counters["calendar_conflicts"] += len(conflicts)
+        for kind, entity, day, mask in conflicts:
+            logging.warning(f"Calendar conflict: {kind} {entity} on {day} at "
+                            f"{', '.join(slot for idx, slot in enumerate(self.time_slots) if mask >> idx & 1)} was booked by another run")
+        return conflicts
+
+    def run(self, backend="greedy", time_limit=30.0, repair_iterations=100000, repair_time_limit=1.0, starts=1, workers=None,
+            incremental=False, state_path=None, cache_dir=None, cache_max_entries=20, cache_max_age_days=30, exams=False,
+            calendar_path=None, calendar_owner=None, calendar_attempts=3):
+        # With cache_dir set, a run whose inputs and options hash to a cached schedule skips
+        # scheduling and renders the cached snapshot (incremental runs are never cached).
+        # With calendar_path set the schedule is reserved in the shared calendar before
+        # rendering; when another run got there first, it is rescheduled against the updated
+        # calendar, up to calendar_attempts times. Every run ends with the metrics report
+        # (write_metrics).
+        with self.timed("load"):
+            self.load()
+        if calendar_path:
+            self.use_calendar(calendar_path, calendar_owner)
+        if incremental and not os.path.exists(self.state_path(state_path)):
+            logging.info(f"No schedule state at {self.state_path(state_path)}, scheduling from scratch")
+            incremental = False
+        cache_key = None if cache_dir is None or incremental else \
+            self.cache_key(backend, time_limit, repair_iterations, repair_time_limit, starts, self.calendar_digest)
+        cached = cache_key and os.path.join(cache_dir, cache_key)
+        hit = bool(cached) and os.path.exists(cached + ".snapshot") and os.path.exists(cached + ".json")
+        if hit:
+            logging.info(f"Inputs unchanged, using cached schedule {cache_key[:12]} from {cache_dir}")
+            with self.timed("cached schedule"):
+                self.load_snapshot(cached + ".snapshot")
+                self.restore_placements(cached + ".json")
+            os.utime(cached + ".snapshot")
+            os.utime(cached + ".json")
+        elif incremental:
+            with self.timed("reschedule"):
+                self.reschedule(state_path, repair_iterations, repair_time_limit)
+        else:
+            self.schedule(backend, time_limit, repair_iterations, repair_time_limit, starts, workers)
+        attempt = 1
+        while self.calendar:
+            with self.timed("calendar"):
+                conflicts = self.reserve_calendar()
+            if not conflicts:
+                break
+            if attempt == calendar_attempts:
+                raise RuntimeError(f"Could not reserve the schedule in calendar {self.calendar.path} "
+                                   f"after {calendar_attempts} attempts")
+            attempt += 1
+            logging.info(f"Rescheduling against the updated calendar (attempt {attempt} of {calendar_attempts})")
+            self.refresh_calendar()
+            hit = False
+            cached = cache_key and os.path.join(cache_dir, self.cache_key(backend, time_limit, repair_iterations, repair_time_limit,
+                                                                          starts, self.calendar_digest))
+            if incremental:
+                with self.timed("reschedule"):
+                    self.reschedule(state_path, repair_iterations, repair_time_limit)
+            else:
+                self.schedule(backend, time_limit, repair_iterations, repair_time_limit, starts, workers)
+        with self.timed("assistants"):
+            self.allocate_assistants()
+        with self.timed("html"):
+            self.render_html()
+        with self.timed("excel"):
+            self.render_excel()
+        with self.timed("views"):
+            self.render_views()
+        if hit:
+            # Cache hit: the state and snapshot are copied rather than written again
+            os.makedirs(os.path.dirname(self.state_path(state_path)) or ".", exist_ok=True)
+            shutil.copyfile(cached + ".json", self.state_path(state_path))
+            shutil.copyfile(cached + ".snapshot", os.path.join(self.output_dir, "timetable.snapshot"))
+        else:
+            with self.timed("state and snapshot"):
+                self.save_state(state_path)
+                self.save_snapshot()
+            if cached:
+                os.makedirs(cache_dir, exist_ok=True)
+                # Copy under temporary names first so a concurrent run never sees half an entry
+                # (per process, since batch jobs with identical inputs share a key)
+                for suffix, source in ((".json", self.state_path(state_path)), (".snapshot", os.path.join(self.output_dir, "timetable.snapshot"))):
+                    shutil.copyfile(source, f"{cached}{suffix}.{os.getpid()}.tmp")
+                    os.replace(f"{cached}{suffix}.{os.getpid()}.tmp", cached + suffix)
+                evict_cache(cache_dir, cache_max_entries, cache_max_age_days)
+        if exams:
+            with self.timed("exams"):
+                self.schedule_exams().render_exams()
+        self.write_metrics()
+        return self
+
+def evict_cache(cache_dir, max_entries=20, max_age_days=30):
+    # Drop cached schedules older than max_age_days (by last use), then all but the
+    # max_entries most recently used
+    entries = {}
+    for name in os.listdir(cache_dir):
+        key, suffix = os.path.splitext(name)
+        if suffix in (".snapshot", ".json"):
+            entries.setdefault(key, []).append(os.path.join(cache_dir, name))
+    last_used = {key: max(os.path.getmtime(path) for path in paths) for key, paths in entries.items()}
+    cutoff = time.time() - max_age_days * 86400
+    ordered = sorted(entries, key=lambda key: last_used[key], reverse=True)
+    evicted = [key for number, key in enumerate(ordered) if number >= max_entries or last_used[key] < cutoff]
+    for key in evicted:
+        for path in entries[key]:
+            os.remove(path)
+    if evicted:
+        logging.info(f"Evicted {len(evicted)} cached schedules from {cache_dir}")
+    return evicted
+
+
+# Multi-start workers: each process loads the data once and reuses it for every pass
+_worker_generator = None
+
+def _init_multi_start_worker(data_dir, output_dir, shared_data, calendar_busy):
+    global _worker_generator
+    # Per-attempt logs from many processes would interleave; the parent logs a summary
+    logging.getLogger().setLevel(logging.ERROR)
+    _worker_generator = TimetableGenerator(data_dir, output_dir, shared_data=shared_data).load()
+    _worker_generator.calendar_busy = calendar_busy
+
+def _multi_start_pass(seed, repair_iterations, repair_time_limit):
+    # The worker's counters add up over its passes, so this pass's share is the difference
+    before = dict(_worker_generator.counters)
+    generator = _worker_generator.schedule_greedy(repair_iterations, repair_time_limit, seed)
+    number = {session: idx for idx, session in enumerate(generator.sessions)}
+    counters = {name: value - before[name] for name, value in generator.counters.items()}
+    return seed, generator.score(), {number[session]: placement for session, placement in generator.placements.items()}, \
+        counters, generator.repair_stats, {number[session]: supervisor for session, supervisor in generator.lab_supervisors.items()}
+
+# Batch runs: several data folders (terms, campuses) scheduled concurrently, one job at a
+# time per process. The CSVs they have in common (faculty, rooms, ...) are read once in the
+# parent from the shared folder and handed to each worker when it starts; a file in a
+# job's own data folder takes precedence. Each job writes to <output_dir>/<name>.
+_batch_shared_data = None
+
+def _init_batch_worker(shared_data):
+    global _batch_shared_data
+    logging.getLogger().setLevel(logging.ERROR)
+    _batch_shared_data = shared_data
+
+def _batch_job(name, data_dir, output_dir, options):
+    started = time.perf_counter()
+    result = {"name": name, "data_dir": data_dir, "output_dir": output_dir}
+    try:
+        generator = TimetableGenerator(data_dir, output_dir, shared_data=_batch_shared_data).run(**options)
+        result.update(sessions=len(generator.sessions), placed=len(generator.placements))
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def load_shared_data(shared_dir):
+    # {csv name: DataFrame} for every CSV in shared_dir (none without one)
+    if not shared_dir:
+        return {}
+    return {name: pd.read_csv(os.path.join(shared_dir, name)) for name in sorted(os.listdir(shared_dir)) if name.endswith(".csv")}
+
+
+def read_manifest(path):
+    # Jobs [(name or None, data_dir)] and the shared folder of a JSON manifest, either
+    # {"shared_dir": ..., "jobs": [{"name": ..., "data_dir": ...}, ...]} or a list of data
+    # folders. Relative paths are taken from the manifest's folder.
+    with open(path) as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for job in manifest["jobs"]:
+        job = {"data_dir": job} if isinstance(job, str) else job
+        jobs.append((job.get("name"), os.path.join(base, job["data_dir"])))
+    shared_dir = manifest.get("shared_dir")
+    return jobs, shared_dir and os.path.join(base, shared_dir)
+
+
+def run_batch(jobs, output_dir="output", shared_dir=None, processes=None, **options):
+    # Run every (name, data_dir) job with TimetableGenerator.run(**options) in a pool of
+    # `processes` and return one summary per job in order: name, folders, sessions and placed
+    # counts, seconds, and "error" for a job that failed. Unnamed jobs are named after
+    # their data folder, with a number added when two folders share a name.
+    named = []
+    taken = set()
+    for name, data_dir in jobs:
+        name = name or os.path.basename(os.path.normpath(data_dir))
+        unique, number = name, 2
+        while unique in taken:
+            unique, number = f"{name}_{number}", number + 1
+        taken.add(unique)
+        named.append((unique, data_dir))
+    shared_data = load_shared_data(shared_dir)
+    if shared_data:
+        logging.info(f"Read {', '.join(shared_data)} once from {shared_dir} for {len(named)} jobs")
+    logging.info(f"Running {len(named)} timetable jobs on {processes or os.cpu_count()} processes")
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_batch_worker, initargs=(shared_data,)) as executor:
+        futures = [executor.submit(_batch_job, name, data_dir, os.path.join(output_dir, name), options) for name, data_dir in named]
+        results = []
+        for future in futures:
+            result = future.result()
+            if "error" in result:
+                logging.error(f"Job {result['name']} ({result['data_dir']}) failed after {result['seconds']}s: {result['error']}")
+            else:
+                logging.info(f"Job {result['name']}: placed {result['placed']} of {result['sessions']} sessions "
+                             f"in {result['seconds']}s, output in {result['output_dir']}")
+            results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate course timetables from the CSV files in the data folder.")
+    parser.add_argument("--data-dir", default="data", help="folder containing courses.csv, rooms.csv, ... (default: data)")
+    parser.add_argument("--output-dir", default="output", help="folder for timetable.html and timetable.xlsx (default: output)")
+    parser.add_argument("--backend", default="greedy", choices=["greedy"] + list(exact_backends),
+                        help="greedy first-fit only, or refine it with an exact solver (cpsat needs ortools)")
+    parser.add_argument("--time-limit", type=float, default=30.0, help="time limit in seconds for the exact backend (default: 30)")
+    parser.add_argument("--repair-iterations", type=int, default=100000,
+                        help="move budget for repairing sessions greedy could not place, 0 disables repair (default: 100000)")
+    parser.add_argument("--repair-time-limit", type=float, default=1.0, help="time budget in seconds for the repair phase (default: 1)")
+    parser.add_argument("--starts", type=int, default=1,
+                        help="number of independently seeded scheduling passes, the best one is kept (default: 1)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for --starts (default: one per CPU)")
+    parser.add_argument("--state", default=None, help="schedule state file written after every run (default: <output-dir>/schedule_state.json)")
+    parser.add_argument("--cache-dir", default=".timetable_cache",
+                        help="reuse the schedule of an earlier run with identical inputs and options (default: .timetable_cache)")
+    parser.add_argument("--no-cache", action="store_true", help="always schedule from scratch and do not update the cache")
+    parser.add_argument("--cache-max-entries", type=int, default=20, help="cached schedules to keep (default: 20)")
+    parser.add_argument("--cache-max-age-days", type=float, default=30, help="drop cached schedules unused for this long (default: 30)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the placements in --state and only place new or changed courses")
+    parser.add_argument("--exams", action="store_true", help="also write the exam timetable and seating plans")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="profile the run with cProfile and write the stats to PATH (read with python -m pstats)")
+    parser.add_argument("--verbose", action="store_true", help="log every placement attempt (DEBUG level)")
+    parser.add_argument("--calendar", default=None, metavar="PATH",
+                        help="SQLite faculty and room calendar shared with other runs; their bookings are respected")
+    parser.add_argument("--calendar-owner", default=None,
+                        help="name of this run's bookings in --calendar (default: the data folder)")
+    parser.add_argument("--batch", nargs="+", default=None, metavar="DATA_DIR",
+                        help="schedule several data folders concurrently, each into <output-dir>/<folder name>")
+    parser.add_argument("--manifest", default=None, help="JSON list of batch jobs (see README), instead of --batch")
+    parser.add_argument("--shared-dir", default=None,
+                        help="folder of CSVs common to all batch jobs (e.g. faculty.csv, rooms.csv), read once")
+    parser.add_argument("--batch-workers", type=int, default=None, help="processes for --batch or --manifest (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    # Set up logging
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+
+    if args.batch or args.manifest:
+        jobs, shared_dir = read_manifest(args.manifest) if args.manifest else ([(None, data_dir) for data_dir in args.batch], None)
+        results = run_batch(jobs, args.output_dir, args.shared_dir or shared_dir, args.batch_workers,
+                            backend=args.backend, time_limit=args.time_limit, repair_iterations=args.repair_iterations,
+                            repair_time_limit=args.repair_time_limit, starts=args.starts, workers=args.workers,
+                            incremental=args.incremental, cache_dir=None if args.no_cache else args.cache_dir,
+                            cache_max_entries=args.cache_max_entries, cache_max_age_days=args.cache_max_age_days, exams=args.exams,
+                            calendar_path=args.calendar)
+    else:
+        generator = TimetableGenerator(args.data_dir, args.output_dir)
+        generator.run(args.backend, args.time_limit, args.repair_iterations, args.repair_time_limit,
+                      args.starts, args.workers, args.incremental, args.state,
+                      None if args.no_cache else args.cache_dir, args.cache_max_entries, args.cache_max_age_days, args.exams,
+                      args.calendar, args.calendar_owner)
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        logging.info(f"Wrote cProfile stats to {args.profile}")
+
+    if args.batch or args.manifest:
+        failed = [result["name"] for result in results if "error" in result]
+        if failed:
+            print(f"{len(failed)} of {len(results)} timetable jobs failed: {', '.join(failed)}")
+            sys.exit(1)
+        print(f"Generated {len(results)} timetables in the '{args.output_dir}' directory.")
+        return
+
+    logging.info(f"Timetable generated successfully in the '{args.output_dir}' directory.")
+    print(f"Timetable generated successfully in the '{args.output_dir}' directory.")
 
-wb.save(os.path.join(output_dir, "timetable.xlsx"))
 
-logging.info("Timetable generated successfully in the 'output' directory.")
-print("Timetable generated successfully in the 'output' directory.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()